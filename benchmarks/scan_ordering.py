@@ -0,0 +1,120 @@
+# encoding: utf-8
+"""
+Benchmark the scan ordering stage on a synthetic dataset tree.
+
+Builds a tree of small netCDF files, then reads the global attributes of
+every file in each ordering and reports opens per second. The interleaved
+ordering visits the directories round robin, as happens when file listings
+from several directories are merged.
+
+Run on the filesystem you want to measure, with cold caches for each
+ordering, to see the effect of locality:
+
+    python benchmarks/scan_ordering.py --path /gws/scratch/tagger_bench --drop-caches
+
+--drop-caches needs root. Without it, each ordering after the first mostly
+reads from the page cache.
+"""
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import argparse
+from itertools import zip_longest
+import pathlib
+import subprocess
+import tempfile
+import time
+
+import netCDF4
+
+from cci_tag_scanner.dataset import Dataset
+from cci_tag_scanner.file_handlers.netcdf import NetcdfHandler
+from cci_tag_scanner.utils.locality import order_by_locality
+
+ATTRS = {
+    'time_coverage_resolution': 'P1M',
+    'platform': 'NOAA-16',
+    'sensor': 'AVHRR',
+    'institution': 'DWD',
+    'product_version': '3.0'
+}
+
+
+def build_tree(root, n_dirs, n_files):
+    """
+    Write n_files netCDF files into each of n_dirs directories. Files are
+    created round robin across the directories so creation order does not
+    match the directory layout.
+    """
+    directories = [root / f'{d:04d}' for d in range(n_dirs)]
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    for f in range(n_files):
+        for directory in directories:
+            path = directory / f'{2000 + f // 12}{f % 12 + 1:02d}-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-fv3.0.nc'
+            with netCDF4.Dataset(path, 'w') as ds:
+                ds.setncatts(ATTRS)
+
+
+def interleaved(files):
+    """Visit the directories round robin"""
+    by_dir = {}
+    for path in files:
+        by_dir.setdefault(path.parent, []).append(path)
+
+    return [path for group in zip_longest(*by_dir.values()) for path in group if path is not None]
+
+
+def drop_caches():
+    subprocess.run(['sync'], check=True)
+    with open('/proc/sys/vm/drop_caches', 'w') as writer:
+        writer.write('3\n')
+
+
+def scan(files):
+    start = time.perf_counter()
+    for path in files:
+        NetcdfHandler(path).extract_facet_labels('L3C')
+    return len(files) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scan ordering on a synthetic tree')
+    parser.add_argument('--path', help='Directory to build the tree in. Default: a temporary directory')
+    parser.add_argument('--dirs', type=int, default=50, help='Number of directories. Default: %(default)s')
+    parser.add_argument('--files', type=int, default=40, help='Files per directory. Default: %(default)s')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each ordering. Default: %(default)s')
+    parser.add_argument('--drop-caches', action='store_true', help='Drop the page cache before each run (root only)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.path) as tmp:
+        root = pathlib.Path(tmp)
+        build_tree(root, args.dirs, args.files)
+
+        walked = list(Dataset._walk_dataset(root))
+        orderings = {
+            'interleaved': interleaved(order_by_locality(walked, 'directory')),
+            'walk': walked,
+            'directory': order_by_locality(walked, 'directory'),
+            'inode': order_by_locality(walked, 'inode'),
+        }
+
+        print(f'{len(walked)} files in {args.dirs} directories')
+        print(f'{"ordering":<12} {"best opens/s":>12} {"mean opens/s":>12}')
+
+        for name, files in orderings.items():
+            rates = []
+            for _ in range(args.repeat):
+                if args.drop_caches:
+                    drop_caches()
+                rates.append(scan(files))
+
+            print(f'{name:<12} {max(rates):>12.0f} {sum(rates) / len(rates):>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# encoding: utf-8
+"""
+Measure the start up time of the command line entry points.
+
+Each command is run in a fresh interpreter several times and the median wall
+time is compared with its budget. Exits non-zero if any command is over
+budget, so it can be run in CI:
+
+    python benchmarks/startup.py --repeat 10
+
+The single file case tags one empty CCI named file against a small local
+ontology, so it measures imports and set up rather than file reading.
+"""
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Median seconds, including interpreter start up
+BUDGETS = {
+    'python': 0.1,
+    'moles_esgf_tag --help': 0.1,
+    'cci_json_check --help': 0.1,
+    'tag single file': 0.3,
+}
+
+SINGLE_FILE = """
+import sys
+from cci_tag_scanner.tagger import ProcessDatasets
+pds = ProcessDatasets(suppress_file_output=True, json_files=[sys.argv[1]], ontology_local=sys.argv[2])
+print(pds.get_file_tags(sys.argv[3]).drs)
+"""
+
+
+def make_single_file_inputs(directory):
+    dataset = directory / 'cloud'
+    dataset.mkdir()
+    fpath = dataset / '200801-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-fv3.0.nc'
+    fpath.touch()
+
+    mapping = directory / 'cloud.json'
+    mapping.write_text(json.dumps({'datasets': [str(dataset)]}))
+
+    ontology = directory / 'ontology.json'
+    ontology.write_text('[]')
+
+    return str(mapping), str(ontology), str(fpath)
+
+
+def commands(directory):
+    mapping, ontology, fpath = make_single_file_inputs(directory)
+    return {
+        'python': [sys.executable, '-c', 'pass'],
+        'moles_esgf_tag --help': [sys.executable, '-c',
+                                  'from cci_tag_scanner.scripts import CCITaggerCommandLineClient as c; c.main()',
+                                  '--help'],
+        'cci_json_check --help': [sys.executable, '-c',
+                                  'from cci_tag_scanner.scripts import TestJSONFile as t; t.cmd()', '--help'],
+        'tag single file': [sys.executable, '-c', SINGLE_FILE, mapping, ontology, fpath],
+    }
+
+
+def time_command(command, repeat, cwd):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the start up time of the entry points')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each command. Default: %(default)s')
+    args = parser.parse_args()
+
+    over_budget = False
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = pathlib.Path(tmpdir)
+
+        print(f'{"command":<24} {"median s":>9} {"budget s":>9}')
+        for name, command in commands(tmpdir).items():
+            median = time_command(command, args.repeat, tmpdir)
+            over = median > BUDGETS[name]
+            over_budget |= over
+            print(f'{name:<24} {median:>9.3f} {BUDGETS[name]:>9.3f}{"  OVER" if over else ""}')
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
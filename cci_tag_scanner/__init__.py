@@ -1,7 +1,7 @@
 # Logger setup
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
+# Logging is configured by the command line scripts, not on import
 logstream = logging.StreamHandler()
 
 formatter = logging.Formatter('%(levelname)s [%(name)s]: %(message)s')
@@ -6,10 +6,28 @@ __copyright__ = 'Copyright 2024 United Kingdom Research and Innovation'
 __license__ = 'BSD - see LICENSE file in top-level package directory'
 __contact__ = 'daniel.westwood@stfc.ac.uk'
 
+import os
+
 SPARQL_HOST_NAME = 'vocab.ceda.ac.uk'
 
 ESGF_DRS_FILE = 'esgf_drs.json'
+ESGF_DRS_JSONL_FILE = 'esgf_drs.jsonl'
 MOLES_TAGS_FILE = 'moles_tags.csv'
 MOLES_ESGF_MAPPING_FILE = 'moles_esgf_mapping.csv'
 ERROR_FILE = 'error.log'
 LOG_FORMAT = '%(name)s - %(levelname)s - %(message)s'
+
+# On disk cache of the ontology from the vocab server
+HTTP_CACHE_DIR = os.environ.get(
+    'CCI_TAGGER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'cci_tag_scanner'))
+# Seconds a cached copy can be used for if the vocab server cannot be reached
+HTTP_CACHE_MAX_STALE = int(os.environ.get('CCI_TAGGER_CACHE_MAX_STALE', 7 * 24 * 3600))
+# Seconds before the cached copy is checked against the vocab server again
+HTTP_CACHE_REVALIDATE_AFTER = int(os.environ.get('CCI_TAGGER_CACHE_REVALIDATE_AFTER', 300))
+
+# Bytes read from the start of each file to identify the format. Handlers
+# are given the same buffer so small files are only read once
+HEADER_SIZE = 64 * 1024
+
+# Dataset level results, reused while the files, mapping and ontology are unchanged
+RESULT_CACHE_DIR = os.environ.get('CCI_TAGGER_RESULT_CACHE_DIR', os.path.join(HTTP_CACHE_DIR, 'results'))
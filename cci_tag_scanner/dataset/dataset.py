@@ -6,14 +6,23 @@ __copyright__ = 'Copyright 2024 United Kingdom Research and Innovation'
 __license__ = 'BSD - see LICENSE file in top-level package directory'
 __contact__ = 'daniel.westwood@stfc.ac.uk'
 
+from contextlib import nullcontext
+from itertools import islice
+import os
 import pathlib
 import re
 import logging
 import verboselogs
 
 from cci_tag_scanner.conf import constants
+from cci_tag_scanner.dataset.filename_parser import parse_file_names
 from cci_tag_scanner.file_handlers.handler_factory import HandlerFactory
+from cci_tag_scanner.file_handlers.isolation import ScanError
+from cci_tag_scanner.file_handlers.kerchunk import ReferenceMetadata
+from cci_tag_scanner.file_handlers.zarr import is_zarr_store
 from cci_tag_scanner.utils import fpath_as_pathlib
+from cci_tag_scanner.utils.locality import batch_by_directory, order_by_locality
+from cci_tag_scanner.utils.prefetch import HeaderPrefetcher
 from cci_tag_scanner.utils.snippets import get_file_subset
 
 verboselogs.install()
@@ -49,40 +58,187 @@ class Dataset(object):
 
         self.not_found_messages = set()
 
+        # Per-file metadata from a reference document, used in place of scanning
+        self.reference = None
+
+        # IsolatedScanner to read the files in a subprocess. None scans in process
+        self.scanner = None
+
+        # Order to scan the files in. See utils.locality.order_by_locality
+        self.scan_order = None
+
+        # Number of file headers to read ahead while scanning. 0 disables
+        self.prefetch = 0
+
+        # ResultCache to reuse the result while the inputs are unchanged
+        self.result_cache = None
+
+        # AttributeStore to record the raw tags of each file in
+        self.attribute_store = None
+
+        # RunTelemetry to count the files tagged
+        self.telemetry = None
+
+        # RunProfiler to time each file with
+        self.profiler = None
+
+        # Files which could not be scanned. Tagged without file metadata
+        self.failed_files = []
+        self._defer_failures = False
+
         # JSON file loader
         self.dataset_json_mappings = dataset_json_mappings
         self.dataset_defaults = dataset_json_mappings.get_user_defined_defaults(dataset)
         self.dataset_mappings = dataset_json_mappings.get_user_defined_mapping(dataset)
         self.dataset_overrides = dataset_json_mappings.get_user_defined_overrides(dataset)
 
-    def process_dataset(self, max_file_count=0):
+    def reset(self):
+        """
+        Clear the state built up while processing files so the object can
+        be reused. The JSON mappings for the dataset are kept.
+        """
+        self.MULTIPLATFORM = False
+        self.file_map = {}
+        self.dataset_uris = {}
+        self.not_found_messages = set()
+        self.reference = None
+        self.failed_files = []
+        self._defer_failures = False
+
+    def process_dataset(self, max_file_count=0, reference=None):
         """
         Main entry point to process a dataset.
 
         The max file count kwarg can be used for testing on a smaller subset
         of files. When this parameter is set > 1, the file list is restricted
         to netCDF files.
+
+        If a reference document is given, or the mapping JSON lists one in
+        its "references" section, the file attributes are read from it and
+        only files missing from the reference are opened.
+
+        If the dataset has a scanner, files which cannot be scanned within its
+        deadline are retried after the rest of the dataset and are listed in
+        failed_files if they fail again.
         :param max_file_count: default: 0. How many netCDF files to try and scan (int)
+        :param reference: Path to a reference document or ReferenceMetadata. default: None
         :return: URIs for each facet (dict), Files mapped to DRS ID (dict)
         """
 
+        self.reference = self._get_reference(reference)
+
         # Get a list of files in the dataset
         file_list = self._get_dataset_files(max_file_count)
 
+        if self.scan_order:
+            file_list = order_by_locality(file_list, self.scan_order)
+
+        # Skip the scan if the files, mapping and ontology are unchanged. The
+        # files are still scanned if the attribute store has nothing for the
+        # dataset, so it can be retagged later
+        fingerprint = None
+        if self.result_cache is not None and file_list:
+            fingerprint = self.result_cache.fingerprint(
+                self.id, file_list,
+                mapping=self.dataset_json_mappings.load_mapping(self.id),
+                reference=self.reference.fingerprint() if self.reference is not None else None
+            )
+
+            cached = None
+            if self.attribute_store is None or self.attribute_store.has_dataset(self.id):
+                cached = self.result_cache.get(self.id, fingerprint)
+
+            if cached is not None:
+                logger.info(f'Dataset: {self.id} unchanged. Using cached result')
+                self.dataset_uris, self.file_map, self.not_found_messages = cached
+                if self.telemetry is not None:
+                    self.telemetry.files_cached(len(file_list))
+                return self.dataset_uris, self.file_map
+
         logger.info(f'Dataset: {self.id}\n Processing {len(file_list)} files')
 
         # There are no files
         if not file_list:
             raise FileNotFoundError(f'No files found for {self.id}')
 
+        # Replace the stored tags so files removed from the dataset are dropped
+        if self.attribute_store is not None:
+            self.attribute_store.remove_dataset(self.id)
+
+        # Files which time out or crash the scanner are retried once the
+        # rest of the dataset is done
+        deferred = []
+        self._defer_failures = True
+
+        headers = self._iter_headers(file_list)
+        filename_tags = self._iter_filename_tags(file_list)
+
         for file in file_list:
-            file_tags = self.get_file_tags(filepath=file)
-            self._update_dataset_uris(file_tags)
+            # Timed from before the header is fetched, so waiting on the
+            # prefetcher counts against the file
+            with self._file_timer(file):
+                _, header = next(headers)
+                tags_from_filename = next(filename_tags)
+
+                try:
+                    file_tags = self._get_file_tags(file, tags_from_filename, header=header)
+                except ScanError as e:
+                    logger.warning(f'{e}. Will retry at the end of {self.id}')
+                    deferred.append(file)
+                    continue
+
+                self._update_dataset_uris(file_tags)
+
+                self._update_drs_filelist(file_tags, file)
+
+            if self.telemetry is not None:
+                self.telemetry.file_done(file)
+
+        self._defer_failures = False
+
+        for file in deferred:
+            with self._file_timer(file):
+                file_tags = self.get_file_tags(filepath=file)
+                self._update_dataset_uris(file_tags)
+
+                self._update_drs_filelist(file_tags, file)
 
-            self._update_drs_filelist(file_tags, file)
+            if self.telemetry is not None:
+                self.telemetry.file_done(file)
+
+        # Results with failed files are not kept so the files are tried again next time
+        if fingerprint is not None and not self.failed_files:
+            self.result_cache.put(self.id, fingerprint, self.dataset_uris, self.file_map, self.not_found_messages)
+
+        if self.attribute_store is not None:
+            self.attribute_store.commit()
 
         return self.dataset_uris, self.file_map # URIs for MOLES, {} of files organised into datasets
 
+    def retag_dataset(self):
+        """
+        Rebuild the result of process_dataset from the raw tags in the
+        attribute store, after a change to the ontology or the JSON mapping.
+        The files are not read.
+
+        :return: URIs for each facet (dict), Files mapped to DRS ID (dict) | None, {} if nothing is stored
+        """
+        stored = self.attribute_store.get_files(self.id)
+
+        if not stored:
+            logger.error(f'No stored attributes for {self.id}. Run without --retag first')
+            return None, {}
+
+        logger.info(f'Dataset: {self.id}\n Retagging {len(stored)} files')
+
+        for filepath, tags_from_filename, tags_from_metadata in stored:
+            file_tags = self._get_uris_from_tags(tags_from_filename, tags_from_metadata)
+            self._update_dataset_uris(file_tags)
+
+            self._update_drs_filelist(file_tags, pathlib.Path(filepath))
+
+        return self.dataset_uris, self.file_map
+
     def generate_ds_id(self, drs_facets, filepath):
         """
         Turn the drs labels into an identifier
@@ -166,13 +322,70 @@ class Dataset(object):
         return drs_labels
 
     @fpath_as_pathlib('filepath')
-    def get_file_tags(self, filepath):
+    def get_file_tags(self, filepath, header=None):
         """
         Extract the URIs from the vocab server which matches the terms
         found in the file path and the file metadata.
 
         The file must be a pathlib.Path object so is checked by a decorator.
         :param file: Filepath (str | pathlib.Path)
+        :param header: Bytes already read from the start of the file. default: None
+        :return: URIs (dict)
+        """
+        # Get tags from filepath
+        tags_from_filename = self._parse_file_name(filepath)
+
+        return self._get_file_tags(filepath, tags_from_filename, header=header)
+
+    def get_files_tags(self, filepaths):
+        """
+        Batch version of get_file_tags. The filenames are parsed together
+        in one pass rather than one at a time.
+
+        :param filepaths: Filepaths (iterable of str | pathlib.Path)
+        :return: generator of URIs (dict), one for each file in order
+        """
+        filepaths = [pathlib.Path(f) for f in filepaths]
+
+        parsed_names = parse_file_names([f.name for f in filepaths])
+
+        for i, filepath in enumerate(filepaths):
+            tags_from_filename = parsed_names.get_tags(i)
+
+            if not tags_from_filename:
+                logger.warning(f'Invalid filename format in dataset: {self.id} for file {filepath.name}')
+
+            yield self._get_file_tags(filepath, tags_from_filename)
+
+    def _get_file_tags(self, filepath, tags_from_filename, header=None):
+        """
+        Extract the URIs for a file once the tags have been taken
+        from the filename.
+
+        :param filepath: Filepath (pathlib.Path)
+        :param tags_from_filename: Output from _parse_file_name (dict)
+        :param header: Bytes already read from the start of the file | None
+        :return: URIs (dict)
+        """
+        file_tags = self.dataset_defaults.copy()
+        file_tags.update(tags_from_filename)
+
+        # Get tags from file metadata
+        tags_from_metadata = self._scan_file(filepath, file_tags, header=header)
+
+        # Keep the raw tags so the file can be retagged without reading it
+        if self.attribute_store is not None:
+            self.attribute_store.put(self.id, filepath.as_posix(), tags_from_filename, tags_from_metadata)
+
+        return self._get_uris_from_tags(tags_from_filename, tags_from_metadata)
+
+    def _get_uris_from_tags(self, tags_from_filename, tags_from_metadata):
+        """
+        Turn the raw tags from the filename and file metadata into URIs.
+        Only uses the JSON mappings and the ontology, not the file.
+
+        :param tags_from_filename: Output from _parse_file_name (dict)
+        :param tags_from_metadata: Output from _scan_file (dict)
         :return: URIs (dict)
         """
         # Set the multi platform flag
@@ -181,14 +394,9 @@ class Dataset(object):
         # Get default tags
         file_tags = self.dataset_defaults.copy()
         logger.info(f'DEFAULTS: {file_tags}')
-        # Get tags from filepath
-        tags_from_filename = self._parse_file_name(filepath)
         file_tags.update(tags_from_filename)
 
         logger.info(f'FILENAME: {tags_from_filename}')
-
-        # Get tags from file metadata
-        tags_from_metadata = self._scan_file(filepath, file_tags)
         logger.info(f'META: {tags_from_metadata}')
 
         # Process file tags from the metadata for multivalues
@@ -415,9 +623,9 @@ class Dataset(object):
 
         # Can ask for all files because this returns a generator and has not done
         # any work yet.
-        all_files = path.glob('**/*')
+        all_files = self._walk_dataset(path)
 
-        if path.is_file():
+        if path.is_file() or (path.is_dir() and is_zarr_store(path)):
             return [path]
 
         if max_file_count > 0:
@@ -427,12 +635,113 @@ class Dataset(object):
             filelist = get_file_subset(all_netcdf, max_file_count)
 
             if not filelist:
-                filelist = get_file_subset(all_files, max_file_count)
+                filelist = list(islice(all_files, max_file_count))
 
             return filelist
 
         # Return all files from the dataset recursively
-        return [item for item in all_files if item.is_file()]
+        return list(all_files)
+
+    def _iter_filename_tags(self, file_list):
+        """
+        Parse the filenames one directory at a time. The names in each
+        directory are parsed together in one pass.
+        :param file_list: Files to scan (list of pathlib.Path)
+        :return: generator of tags from the filename (dict), one for each file in order
+        """
+        for _, batch in batch_by_directory(file_list):
+            parsed_names = parse_file_names([f.name for f in batch])
+
+            for i, filepath in enumerate(batch):
+                tags_from_filename = parsed_names.get_tags(i)
+
+                if not tags_from_filename:
+                    logger.warning(f'Invalid filename format in dataset: {self.id} for file {filepath.name}')
+
+                yield tags_from_filename
+
+    def _iter_headers(self, file_list):
+        """
+        Pair each file with its header, read ahead of time if prefetch is
+        enabled. Files in the reference document are not read.
+
+        There is no prefetch when files are scanned in a worker subprocess.
+        The worker reads the file itself, and a read here could hang outside
+        the worker's deadline.
+        :param file_list: Files to scan (list of pathlib.Path)
+        :return: generator of file (pathlib.Path), header (bytes | None)
+        """
+        if not self.prefetch or self.scanner is not None:
+            return ((file, None) for file in file_list)
+
+        def in_reference(file):
+            return self.reference is not None and file in self.reference
+
+        return iter(HeaderPrefetcher(file_list, depth=self.prefetch, skip=in_reference))
+
+    def _file_timer(self, filepath):
+        """
+        :param filepath: File being tagged
+        :return: Context manager timing the file with the profiler, if there is one
+        """
+        if self.profiler is None:
+            return nullcontext()
+
+        return self.profiler.time_file(self.id, filepath)
+
+    def _get_reference(self, reference):
+        """
+        Load the reference document for the dataset
+        :param reference: Path to a reference document, ReferenceMetadata or None
+        :return: ReferenceMetadata | None
+        """
+        if reference is None:
+            reference = self.dataset_json_mappings.get_dataset_reference(self.id)
+
+        if reference is None or isinstance(reference, ReferenceMetadata):
+            return reference
+
+        try:
+            metadata = ReferenceMetadata.from_file(reference, root=self.id)
+        except (OSError, ValueError) as e:
+            logger.error(f'Could not read reference {reference} for {self.id}: {e}. Scanning files instead')
+            return None
+
+        logger.info(f'Loaded metadata for {len(metadata)} files from {reference}')
+        return metadata
+
+    @staticmethod
+    def _walk_dataset(path):
+        """
+        Walk the dataset directory yielding the files to tag. A Zarr store is
+        yielded once as a single unit and the chunk files inside it are not
+        walked. Stores are found from the .zarr suffix or the directory
+        listing the walk already has, so no extra files are checked.
+
+        :param path: Dataset directory (pathlib.Path)
+        :return: generator of pathlib.Path
+        """
+        for dirpath, dirnames, filenames in os.walk(path, followlinks=True):
+            dirpath = pathlib.Path(dirpath)
+
+            # A store without the .zarr suffix is recognised from its marker
+            # files once it has been listed
+            if is_zarr_store(dirpath, filenames):
+                yield dirpath
+                dirnames[:] = []
+                continue
+
+            # Stores with the suffix are not listed at all
+            stores = [d for d in dirnames if pathlib.PurePath(d).suffix == '.zarr']
+            for store in stores:
+                yield dirpath / store
+
+            dirnames[:] = [d for d in dirnames if d not in stores]
+
+            for filename in filenames:
+                filepath = dirpath / filename
+                if filepath.is_file():
+                    yield filepath
 
     def _get_mapping(self, facet, term):
         """
@@ -463,45 +772,21 @@ class Dataset(object):
         return term
 
     def _get_platform_as_programme(self, platform):
-        tags = []
-
-        # check if the platform is really a platform programme
-        if platform in self._facets.get_programme_labels():
-            programme_uri = self._get_term_uri(constants.PLATFORM_PROGRAMME, platform)
-            tags.append(programme_uri)
-
-            try:
-                group = self._facets.get_programmes_group(programme_uri)
-                if group:
-                    group_uri = self._get_term_uri(constants.PLATFORM_GROUP, group)
-                    tags.append(group_uri)
-
-            except KeyError:
-                # not all programmes have groups
-                pass
-
-        # check if the platform is really a platform group
-        elif platform in self._facets.get_group_labels():
-            group_uri = self._get_term_uri(constants.PLATFORM_GROUP, platform)
-            tags.append(group_uri)
-
-        return tags
+        """
+        Check if the platform is really a platform programme or group and
+        return the programme and group URIs
+        :param platform: platform term
+        :return: list of URIs
+        """
+        return list(self._facets.get_platform_label_hierarchy(platform))
 
     def _get_programme_group(self, term_uri):
-        # now add the platform programme and group
-        tags = []
-
-        programme = self._facets.get_platforms_programme(term_uri)
-        if programme:
-            programme_uri = self._get_term_uri(constants.PLATFORM_PROGRAMME, programme)
-            tags.append(programme_uri)
-
-            group = self._facets.get_programmes_group(programme_uri)
-            if group:
-                group_uri = self._get_term_uri(constants.PLATFORM_GROUP, group)
-                tags.append(group_uri)
-
-        return tags
+        """
+        Get the platform programme and group URIs for a platform URI
+        :param term_uri: platform URI
+        :return: list of URIs
+        """
+        return list(self._facets.get_platform_hierarchy(term_uri))
 
     def _get_term_uri(self, facet, term):
         """
@@ -620,20 +905,43 @@ class Dataset(object):
 
         return file_attributes
 
-    def _scan_file(self, filename, file_tags):
+    def _scan_file(self, filename, file_tags, header=None):
         """
         Scan the file and extract tags from the metadata
         :param filename:
+        :param header: Bytes already read from the start of the file | None
         :return:
         """
         labels = {}
         proc_level = file_tags.get(constants.PROCESSING_LEVEL)
 
-        # File specific parser
-        handler = HandlerFactory.get_handler(filename.suffix)
+        # Attributes from the reference document, if the file is in it
+        if self.reference is not None:
+            labels = self.reference.get_labels(filename)
+
+            if labels is not None:
+                return labels
+
+            logger.debug(f'{filename} not in reference. Scanning file')
+            labels = {}
+
+        # Scan in a subprocess with a deadline
+        if self.scanner is not None:
+            try:
+                return self.scanner.scan(filename, proc_level)
+            except ScanError as e:
+                if self._defer_failures:
+                    raise
+
+                logger.error(f'{e}. Tagging {filename} without file metadata')
+                self.failed_files.append(filename.as_posix())
+                return labels
+
+        # File specific parser, chosen from the file contents
+        handler, header = HandlerFactory.get_handler_for_path(filename, header=header)
 
         if handler:
-            labels = handler(filename).extract_facet_labels(proc_level)
+            labels = handler(filename, header=header).extract_facet_labels(proc_level)
 
         return labels
 
@@ -0,0 +1,106 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from collections import namedtuple
+import re
+
+from cci_tag_scanner.conf import constants
+
+# Both CCI filename forms in a single pattern. See Dataset._parse_file_name
+# Form 1
+#     <Indicative Date>[<Indicative Time>]-ESACCI
+#     -<Processing Level>_<CCI Project>-<Data Type>-<Product String>
+#     [-<Additional Segregator>][-v<GDS version>]-fv<File version>.nc
+# Form 2
+#     ESACCI-<CCI Project>-<Processing Level>-<Data Type>-
+#     <Product String>[-<Additional Segregator>]-
+#     <IndicativeDate>[<Indicative Time>]-fv<File version>.nc
+FILENAME_PATTERN = re.compile(
+    r'^(?:'
+    r'(?P<date1>[^-]*)-ESACCI-(?P<level1>[^-_]*)_(?P<project1>[^-_]*)[^-]*'
+    r'-(?P<type1>[^-]*)-(?P<product1>[^-]*)(?:-.*)?'
+    r'|'
+    r'ESACCI-(?P<project2>[^-]*)-(?P<level2>[^-]*)-(?P<type2>[^-]*)-(?P<product2>[^-]*)'
+    r'(?:-(?:[^-]*-)*?(?P<date2>[^-]*)-[^-]*|-[^-]*)?'
+    r')$'
+)
+
+_GROUPS = FILENAME_PATTERN.groupindex
+_N_GROUPS = FILENAME_PATTERN.groups
+
+
+class FileNameColumns(namedtuple('FileNameColumns', [
+        'processing_level', 'project', 'data_type', 'product_string',
+        'indicative_date', 'valid'])):
+    """
+    Columnar result of parse_file_names. Each field is a numpy array with
+    one entry per filename. Invalid filenames have empty strings and are
+    False in the valid mask.
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.valid)
+
+    def get_tags(self, index):
+        """
+        Return the tags for a single file in the same form as
+        Dataset._parse_file_name
+        :param index: Position of the file in the input
+        :return: tags (dict) | {}
+        """
+
+        if not self.valid[index]:
+            return {}
+
+        project = str(self.project[index])
+
+        return {
+            constants.PROCESSING_LEVEL: str(self.processing_level[index]),
+            constants.PROJECT: project,
+            constants.ECV: project,
+            constants.DATA_TYPE: str(self.data_type[index]),
+            constants.PRODUCT_STRING: str(self.product_string[index])
+        }
+
+
+def _select(np, cols, form1, name):
+    return np.where(form1, cols[:, _GROUPS[f'{name}1'] - 1], cols[:, _GROUPS[f'{name}2'] - 1])
+
+
+def parse_file_names(names):
+    """
+    Parse a batch of CCI filenames in one pass.
+
+    :param names: Iterable of file basenames
+    :return: FileNameColumns
+    """
+    # Imported here so tagging single files does not load numpy
+    import numpy as np
+
+    matches = [FILENAME_PATTERN.match(name) for name in names]
+
+    valid = np.fromiter((m is not None for m in matches), dtype=bool, count=len(matches))
+    form1 = np.fromiter(
+        (m is not None and m.start('product1') != -1 for m in matches),
+        dtype=bool, count=len(matches)
+    )
+
+    empty = ('',) * _N_GROUPS
+    cols = np.array(
+        [m.groups('') if m else empty for m in matches], dtype=str
+    ).reshape(len(matches), _N_GROUPS)
+
+    return FileNameColumns(
+        processing_level=_select(np, cols, form1, 'level'),
+        project=_select(np, cols, form1, 'project'),
+        data_type=_select(np, cols, form1, 'type'),
+        product_string=_select(np, cols, form1, 'product'),
+        indicative_date=_select(np, cols, form1, 'date'),
+        valid=valid
+    )
@@ -10,30 +10,46 @@ from cci_tag_scanner.conf.constants import DATA_TYPE, FREQUENCY, INSTITUTION, PL
     SENSOR, ECV, PLATFORM_PROGRAMME, PLATFORM_GROUP, PROCESSING_LEVEL, \
     PRODUCT_STRING, BROADER_PROCESSING_LEVEL, PRODUCT_VERSION, PROJECT
 from cci_tag_scanner.conf.settings import SPARQL_HOST_NAME
+from cci_tag_scanner.utils.http_cache import HTTPCache
+from cci_tag_scanner.utils.json_stream import CHUNK_SIZE, iter_json_array, read_chunks
 
 # Removal of the SPARQL Query/Triple Store components
 #from cci_tag_scanner.triple_store import TripleStore, Concept
 
+from functools import partial
+import hashlib
 import re
 import os
-import requests
 import json
 
 import logging
 from cci_tag_scanner import logstream
-from typing import Union
+from typing import Iterable, Union
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logstream)
 logger.propagate = False
 
+def _identity(uri):
+    return uri
+
+
+def _get_or_key(table, key):
+    return table.get(key) or key
+
+
 class Concept:
     """
     Storage object for concepts to allow
     the terms to be reveresed and get the
     correct tag in return.
+
+    Uses slots as there is one of these for every
+    label in the ontology.
     """
 
+    __slots__ = ('uri', 'tag')
+
     def __init__(self, tag, uri):
         self.uri = str(uri)
         self.tag = str(tag)
@@ -89,7 +105,8 @@ class Facets(object):
         PROJECT: '_get_pref_label'
     }
 
-    def __init__(self, facet_dict: dict = None, endpoint: str = None, data: dict = None):
+    def __init__(self, facet_dict: dict = None, endpoint: str = None, data: dict = None,
+                 cache_dir: str = None, max_stale: int = None, use_cache: bool = True):
 
         facet_dict     = facet_dict or self.FACET_ENDPOINTS
         self._endpoint = endpoint or self.DEFAULT_ENDPOINT
@@ -108,6 +125,7 @@ class Facets(object):
 
         if data is not None:
             self._load_from_json(data)
+            self._build_lookup_tables()
             return
 
         # mapping from platform uri to platform programme label
@@ -119,27 +137,42 @@ class Facets(object):
         # mapping for process levels
         self.__proc_level_mappings = {}
 
-        # Perform decoding here
-        if self._endpoint.startswith('http'):
+        # Perform decoding here. Records are decoded from the document one
+        # at a time so the raw content is never held in memory as a whole
+        if self._endpoint.startswith('http') and use_cache:
+            cache_path = HTTPCache(self._endpoint, cache_dir=cache_dir, max_stale=max_stale).fetch()
+            with open(cache_path) as f:
+                self._decode_json(iter_json_array(read_chunks(f)))
+        elif self._endpoint.startswith('http'):
+            # Imported here as most runs read the ontology from the cache or a local file
+            import requests
+
             try:
-                raw_content = requests.get(self._endpoint, verify=False).json()
-            except:
+                with requests.get(self._endpoint, verify=False, stream=True) as response:
+                    response.encoding = response.encoding or 'utf-8'
+                    self._decode_json(iter_json_array(
+                        response.iter_content(CHUNK_SIZE, decode_unicode=True)
+                    ))
+            except Exception:
                 raise ValueError(
                     f'Unable to retrieve JSON content from {self._endpoint}'
                 )
         else:
             if os.path.isfile(self._endpoint):
                 with open(self._endpoint) as f:
-                    raw_content = json.load(f)
+                    self._decode_json(iter_json_array(read_chunks(f)))
             else:
                 raise IOError(
                     f'Specified endpoint - {self._endpoint} unreachable.'
                 )
-        
-        self._decode_json(raw_content)
+
         self._reverse_facet_mappings()
         self._map_broad_narrow()
 
+        # Only needed while building the mappings
+        self._broader.clear()
+        self._narrower.clear()
+
         bpl = {}
         for uri in set(self.__proc_level_mappings.values()):
             label = self.__reversible_facets[f'{PROCESSING_LEVEL}-alt'][uri]
@@ -148,8 +181,8 @@ class Facets(object):
 
         self._reverse_facet_mappings(facet=BROADER_PROCESSING_LEVEL)
 
+        # The reversed facets are keyed by URI so do not need lowering
         self.__facets            = self._lower_all_facets(self.__facets)
-        self.__reversible_facets = self._lower_all_facets(self.__reversible_facets, reverse=True)
 
         self.__facets = dict(sorted(self.__facets.items()))
         self.__reversible_facets = dict(sorted(self.__reversible_facets.items()))
@@ -158,6 +191,8 @@ class Facets(object):
         self.__proc_level_mappings = dict(sorted(self.__proc_level_mappings.items()))
         self.__platform_programme_mappings = dict(sorted(self.__platform_programme_mappings.items()))
 
+        self._build_lookup_tables()
+
     @property
     def facets(self) -> dict:
         return self.__facets
@@ -261,6 +296,31 @@ class Facets(object):
         """
         return self.__programme_group_mappings.values()
 
+    def get_platform_hierarchy(self, uri):
+        """
+        Get the programme and group URIs for the given platform URI.
+
+        @param uri (str): the URI of the platform
+
+        @return a tuple of str containing the programme URI followed by
+                the group URI, if there are any
+
+        """
+        return self.__platform_hierarchy.get(uri, ())
+
+    def get_platform_label_hierarchy(self, label):
+        """
+        Get the URIs for a platform label which is really a programme or a
+        group. Programmes give the programme URI followed by the group URI.
+
+        @param label (str): the platform label
+
+        @return a tuple of str containing URIs, empty if the label is not a
+                programme or group
+
+        """
+        return self.__platform_label_hierarchy.get(label, ())
+
     def get_broader_proc_level(self, uri):
         """"
         Get the broader process level URI for the given process level URI.
@@ -293,6 +353,11 @@ class Facets(object):
         :return:
         """
 
+        lookup = self.__label_lookups.get(facet)
+
+        if lookup:
+            return lookup(uri)
+
         label_routing_string = self.LABEL_SOURCE.get(facet)
 
         if label_routing_string:
@@ -377,22 +442,108 @@ class Facets(object):
         """
         output = {}
 
-        for facet in bag:
-            if isinstance(bag[facet],str):
-                uri = bag[facet]
+        for facet, uris in bag.items():
+            if isinstance(uris, str):
+                uris = [uris]
 
-                # Filter out None values
-                output[facet] = list(
-                    filter(None, [self.get_label_from_uri(facet, uri)])
-                )
-            else:
-                # Filter out None values
-                output[facet] = list(
-                    filter(None, [self.get_label_from_uri(facet, uri) for uri in bag[facet]])
-                )
+            lookup = self.__label_lookups.get(facet) or partial(self.get_label_from_uri, facet)
+
+            # Filter out None values
+            output[facet] = [label for label in map(lookup, uris) if label]
 
         return output
 
+    def process_bags(self, bags):
+        """
+        Process many bags at once
+        :param bags: iterable of dictionaries of facets with lists of uris to convert
+        :return: list of dictionaries of facets with the extracted tags
+        """
+        return [self.process_bag(bag) for bag in bags]
+
+    def _build_lookup_tables(self) -> None:
+        """
+        Precompute the URI to label lookup for each facet in LABEL_SOURCE,
+        so that labelling a URI is a single dictionary lookup. Facets
+        whose source table is missing keep using get_label_from_uri.
+        """
+        self.__label_lookups = {}
+
+        for facet, source in self.LABEL_SOURCE.items():
+
+            if source is None:
+                self.__label_lookups[facet] = _identity
+
+            elif source == '_get_pref_label' and facet in self.__reversible_facets:
+                self.__label_lookups[facet] = self.__reversible_facets[facet].get
+
+            elif source == '_get_alt_label' and f'{facet}-alt' in self.__reversible_facets:
+                self.__label_lookups[facet] = self.__reversible_facets[f'{facet}-alt'].get
+
+            elif source == '_get_platform_label':
+                # Resolve the platform, group, programme fallback now. Earlier
+                # facets in the fallback order take precedence
+                table = {}
+                for fallback in [PLATFORM_PROGRAMME, PLATFORM_GROUP, PLATFORM]:
+                    table.update(self.__reversible_facets.get(fallback, {}))
+
+                self.__label_lookups[facet] = partial(_get_or_key, table)
+
+        self._build_platform_hierarchy()
+
+    def _build_platform_hierarchy(self) -> None:
+        """
+        Precompute the programme and group URIs which go with each platform
+        URI, and with each programme or group label which is used in place
+        of a platform.
+        """
+        self.__platform_hierarchy = {}
+        self.__platform_label_hierarchy = {}
+
+        for uri, programme in self.__platform_programme_mappings.items():
+            tags = []
+
+            if programme:
+                programme_uri = self._get_term_uri(PLATFORM_PROGRAMME, programme)
+                tags.append(programme_uri)
+
+                group = self.__programme_group_mappings.get(programme_uri)
+                if group:
+                    tags.append(self._get_term_uri(PLATFORM_GROUP, group))
+
+            self.__platform_hierarchy[uri] = tuple(tags)
+
+        programme_labels = set(self.__platform_programme_mappings.values())
+        group_labels = set(self.__programme_group_mappings.values())
+
+        for label in group_labels - programme_labels:
+            self.__platform_label_hierarchy[label] = (self._get_term_uri(PLATFORM_GROUP, label),)
+
+        for label in programme_labels:
+            programme_uri = self._get_term_uri(PLATFORM_PROGRAMME, label)
+            tags = [programme_uri]
+
+            group = self.__programme_group_mappings.get(programme_uri)
+            if group:
+                tags.append(self._get_term_uri(PLATFORM_GROUP, group))
+
+            self.__platform_label_hierarchy[label] = tuple(tags)
+
+    def _get_term_uri(self, facet, term):
+        """
+        Get the URI for a term from the pref or alt labels
+        :param facet: The facet to check
+        :param term: The term to look up
+        :return: URI | None
+        """
+        term_l = term.lower()
+
+        concept = self.__facets.get(facet, {}).get(term_l) or \
+            self.__facets.get(f'{facet}-alt', {}).get(term_l)
+
+        if concept:
+            return concept.uri
+
     def to_json(self, json_file: Union[str,None] = None) -> Union[dict,None]:
         """
         Write current generated outputs to a json file
@@ -425,6 +576,14 @@ class Facets(object):
 
         return response
 
+    def fingerprint(self) -> str:
+        """
+        Hash of the ontology content. Changes whenever a term, label or
+        mapping changes.
+        """
+        content = json.dumps(self.to_json(), sort_keys=True, default=list)
+        return hashlib.sha256(content.encode()).hexdigest()
+
     @classmethod
     def from_json(cls, json_file: Union[str,None] = None) -> object:
         """
@@ -460,9 +619,10 @@ class Facets(object):
         self.__proc_level_mappings = data['__proc_level_mappings']
         self.__reversible_facets = data['__reversible_facets']
 
-    def _decode_json(self, raw_content: dict) -> None:
+    def _decode_json(self, raw_content: Iterable[dict]) -> None:
         """
-        Decode the json schema passed from the ontology source
+        Decode the json schema passed from the ontology source. Only the
+        SKOS fields used by the tagger are kept from each record.
         """
 
         for record in raw_content:
@@ -556,15 +716,17 @@ class Facets(object):
 
     def _lower_all_facets(self, facets: dict, reverse: bool = False) -> dict:
         """
-        Lower-case labels for all facet values."""
-        new_facets = {}
+        Lower-case labels for all facet values. Facets are replaced one at a
+        time so only one facet is ever held twice. Labels which are already
+        lower case are reused rather than copied."""
+
+        if reverse:
+            return facets
 
         for facet, fset in facets.items():
-            new_set = {}
+            lowered = {}
             for label, lset in fset.items():
-                if reverse:
-                    new_set[label] = lset
-                else:
-                    new_set[label.lower()] = lset
-            new_facets[facet] = new_set
-        return new_facets
+                label_l = label.lower()
+                lowered[label if label_l == label else label_l] = lset
+            facets[facet] = lowered
+        return facets
@@ -7,10 +7,78 @@ __license__ = 'BSD - see LICENSE file in top-level package directory'
 __contact__ = 'daniel.westwood@stfc.ac.uk'
 
 from abc import ABC, abstractmethod
+import logging
+import os
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.conf.settings import HEADER_SIZE
+from cci_tag_scanner.conf.constants import PRODUCT_VERSION, ALLOWED_GLOBAL_ATTRS
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
 
 
 class FileHandler(ABC):
+    """
+    Base class for file handlers. Handlers are created with the path to the
+    file and, optionally, the bytes already read from the start of it:
+
+        handler = Handler(filepath, header=header)
+    """
+
+    @staticmethod
+    def whole_file(filepath, header):
+        """
+        Check whether the header holds the complete file so the handler can
+        work from memory instead of reading the file again
+
+        :param filepath: Path to the file (pathlib.Path)
+        :param header: Bytes read from the start of the file | None
+        :return: bool
+        """
+        if not header:
+            return False
+
+        # Headers are read HEADER_SIZE bytes or more at a time, so a shorter
+        # one stopped at the end of the file
+        if len(header) < HEADER_SIZE:
+            return True
+
+        try:
+            return len(header) == os.path.getsize(filepath)
+        except OSError:
+            return False
 
     @abstractmethod
     def extract_facet_labels(self, proc_level):
         return
+
+    @staticmethod
+    def labels_from_attributes(attrs, filepath):
+        """
+        Pick out the global attributes used for tagging from a dictionary
+        of attributes, in the same form as NetcdfHandler.extract_facet_labels
+
+        :param attrs: Global attributes (dict)
+        :param filepath: File the attributes came from. Used for logging
+        :return: tags (dict)
+        """
+        tags = {}
+
+        for global_attr in ALLOWED_GLOBAL_ATTRS:
+            if global_attr in attrs:
+                tags[global_attr] = attrs[global_attr]
+
+                # Verbose logging
+                logger.debug(f'{global_attr}={attrs[global_attr]}')
+            else:
+                logger.warning(f'Required attr {global_attr} not found in {filepath}')
+
+        # Add product version
+        product_version = attrs.get(PRODUCT_VERSION)
+
+        if product_version is not None and str(product_version):
+            tags[PRODUCT_VERSION] = str(product_version)
+
+        return tags
@@ -6,19 +6,161 @@ __copyright__ = 'Copyright 2024 United Kingdom Research and Innovation'
 __license__ = 'BSD - see LICENSE file in top-level package directory'
 __contact__ = 'daniel.westwood@stfc.ac.uk'
 
-from pydoc import locate
+import logging
+import pathlib
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.conf.settings import HEADER_SIZE
+from cci_tag_scanner.file_handlers.zarr import is_zarr_store
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Entry point group for handlers from other packages. The entry point name
+# is the extension the handler is registered for, e.g. ".grib"
+ENTRY_POINT_GROUP = 'cci_tag_scanner.file_handlers'
+
+
+# pydoc and importlib.metadata are slow to import and only needed the first
+# time a handler is resolved, so they are imported on first use
+def locate(path):
+    from pydoc import locate as _locate
+    return _locate(path)
+
+
+def entry_points():
+    from importlib.metadata import entry_points as _entry_points
+    return _entry_points()
 
 
 class HandlerFactory(object):
 
     HANDLER_MAP = {
-        '.nc': 'cci_tag_scanner.file_handlers.netcdf.NetcdfHandler'
+        '.nc': 'cci_tag_scanner.file_handlers.netcdf.NetcdfHandler',
+        '.zarr': 'cci_tag_scanner.file_handlers.zarr.ZarrHandler',
+        '.json': 'cci_tag_scanner.file_handlers.kerchunk.KerchunkHandler'
     }
 
+    # Magic bytes at the start of a file and the HANDLER_MAP key they map to.
+    # netCDF4 files are HDF5 files
+    MAGIC_MAP = (
+        (b'CDF\x01', '.nc'),
+        (b'CDF\x02', '.nc'),
+        (b'CDF\x05', '.nc'),
+        (b'\x89HDF\r\n\x1a\n', '.nc'),
+    )
+
+    # Resolved handler classes. Filled on first use of each extension
+    _handlers = {}
+    _entry_points_loaded = False
+
+    @classmethod
+    def register(cls, extension, handler):
+        """
+        Register a handler class for an extension
+        :param extension: File extension including the dot, e.g. ".nc"
+        :param handler: FileHandler class or dotted path to one
+        """
+        cls.HANDLER_MAP[extension] = handler
+        cls._handlers.pop(extension, None)
+
+    @classmethod
+    def _load_entry_points(cls):
+        """
+        Add the handlers registered by installed packages
+        """
+        cls._entry_points_loaded = True
+
+        eps = entry_points()
+        eps = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, [])
+
+        for ep in eps:
+            try:
+                cls.register(ep.name, ep.load())
+            except Exception as e:
+                logger.error(f'Could not load file handler {ep.name} from {ep.value}: {e}')
+
     @classmethod
     def get_handler(cls, extension):
 
+        if not cls._entry_points_loaded:
+            cls._load_entry_points()
+
+        try:
+            return cls._handlers[extension]
+        except KeyError:
+            pass
+
         handler = cls.HANDLER_MAP.get(extension)
 
-        if handler:
-            return locate(handler)
\ No newline at end of file
+        if isinstance(handler, str):
+            handler = locate(handler)
+
+        cls._handlers[extension] = handler
+        return handler
+
+    @classmethod
+    def sniff(cls, header):
+        """
+        Identify the format of a file from the start of its contents
+        :param header: First bytes of the file
+        :return: HANDLER_MAP key | None
+        """
+        for magic, extension in cls.MAGIC_MAP:
+            if header.startswith(magic):
+                return extension
+
+        # Kerchunk reference sets are JSON objects with refs or .zattrs keys
+        if header.lstrip()[:1] == b'{' and (b'"refs"' in header or b'".zattrs"' in header):
+            return '.json'
+
+    @staticmethod
+    def read_header(filepath, size=HEADER_SIZE):
+        """
+        :param filepath: Path to the file
+        :param size: Number of bytes to read
+        :return: header (bytes) | b'' if the file cannot be read
+        """
+        try:
+            with open(filepath, 'rb') as reader:
+                return reader.read(size)
+        except OSError as e:
+            # The handler chosen by extension reports the error
+            logger.debug(f'Could not read header from {filepath}: {e}')
+            return b''
+
+    @classmethod
+    def get_handler_for_path(cls, filepath, header=None):
+        """
+        Choose the handler for a file. Files with a registered extension are
+        not opened here. Otherwise, or if the header has already been read,
+        the format is identified from the contents, falling back to the
+        extension if it is not recognised. Zarr stores are identified from
+        their metadata files.
+
+        :param filepath: Path to the file or store (pathlib.Path)
+        :param header: First bytes of the file, if already read
+        :return: handler class | None, header (bytes) | None
+        """
+        filepath = pathlib.Path(filepath)
+
+        if filepath.is_dir():
+            if is_zarr_store(filepath):
+                return cls.get_handler('.zarr'), None
+            return None, None
+
+        if header is None:
+            handler = cls.get_handler(filepath.suffix)
+            if handler is not None:
+                return handler, None
+
+            header = cls.read_header(filepath)
+
+        extension = cls.sniff(header)
+        handler = cls.get_handler(extension) if extension else None
+
+        if handler is None:
+            handler = cls.get_handler(filepath.suffix)
+
+        return handler, header
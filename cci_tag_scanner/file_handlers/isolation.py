@@ -0,0 +1,176 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import logging
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.file_handlers.handler_factory import HandlerFactory
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Seconds to wait for a new worker to import its modules
+WORKER_START_TIMEOUT = 120
+
+
+class ScanError(Exception):
+    """
+    The file could not be scanned because the worker crashed or raised
+    """
+
+
+class ScanTimeout(ScanError):
+    """
+    The file was not scanned within the deadline
+    """
+
+
+def scan_file(filepath, proc_level):
+    """
+    Extract the facet labels from a file with the handler for its format
+    :param filepath: Path to the file (pathlib.Path)
+    :param proc_level: Processing level from the filename
+    :return: labels (dict)
+    """
+    handler, header = HandlerFactory.get_handler_for_path(filepath)
+
+    if handler is None:
+        return {}
+
+    return handler(filepath, header=header).extract_facet_labels(proc_level)
+
+
+def _worker(conn, scan_func):
+    """
+    Worker loop. Runs in the subprocess until it is sent None or the pipe closes
+    """
+    conn.send('ready')
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+
+        if task is None:
+            break
+
+        try:
+            conn.send((True, scan_func(*task)))
+        except Exception as e:
+            conn.send((False, f'{type(e).__name__}: {e}'))
+
+
+class IsolatedScanner(object):
+    """
+    Runs file scans in a worker subprocess so that a hung read or a crash
+    in the netCDF library only costs that file. A worker which misses the
+    deadline is killed and a new one started for the next file. Workers are
+    replaced after max_tasks files to bound any leaks in the C libraries.
+    """
+
+    def __init__(self, timeout=60, max_tasks=1000, scan_func=scan_file):
+        """
+        :param timeout: Seconds allowed to scan each file
+        :param max_tasks: Files to scan before the worker is replaced
+        :param scan_func: Module level function taking (filepath, proc_level)
+        """
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.scan_func = scan_func
+
+        # Only loaded when files are scanned in a worker
+        import multiprocessing
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._tasks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self):
+        conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(target=_worker, args=(child_conn, self.scan_func), daemon=True)
+        self._process.start()
+        child_conn.close()
+
+        self._conn = conn
+        self._tasks = 0
+
+        try:
+            if not conn.poll(WORKER_START_TIMEOUT):
+                raise EOFError
+            conn.recv()
+        except (EOFError, OSError):
+            self._stop(kill=True)
+            raise ScanError('Scan worker did not start')
+
+    def _stop(self, kill=False):
+        if self._process is None:
+            return
+
+        if kill:
+            self._process.kill()
+        else:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def scan(self, filepath, proc_level):
+        """
+        Scan a file in the worker
+
+        :param filepath: Path to the file (pathlib.Path)
+        :param proc_level: Processing level from the filename
+        :return: labels (dict)
+        :raises ScanTimeout: The deadline passed. The worker is killed
+        :raises ScanError: The worker crashed or the handler raised
+        """
+        if self._process is None or self._tasks >= self.max_tasks:
+            self._stop()
+            self._start()
+
+        self._tasks += 1
+
+        try:
+            self._conn.send((filepath, proc_level))
+
+            if not self._conn.poll(self.timeout):
+                self._stop(kill=True)
+                raise ScanTimeout(f'Scanning {filepath} took longer than {self.timeout}s')
+
+            ok, result = self._conn.recv()
+
+        except (EOFError, OSError):
+            self._process.join(1)
+            exitcode = self._process.exitcode
+            self._stop(kill=True)
+            raise ScanError(f'Scan worker crashed reading {filepath} (exit code {exitcode})')
+
+        if not ok:
+            raise ScanError(f'Could not scan {filepath}: {result}')
+
+        return result
+
+    def close(self):
+        self._stop()
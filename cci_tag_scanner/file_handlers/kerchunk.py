@@ -0,0 +1,171 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+from .base import FileHandler
+from .zarr import ZarrHandler
+from cci_tag_scanner import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+def get_reference_attrs(reference):
+    """
+    Get the global attributes from a kerchunk reference set. Handles
+    version 0 (refs at the top level) and version 1 ({"refs": ...}).
+
+    :param reference: Decoded reference JSON (dict)
+    :return: Global attributes (dict) | None if not a reference set
+    """
+    if not isinstance(reference, dict):
+        return None
+
+    refs = reference.get('refs', reference)
+
+    zattrs = refs.get('.zattrs') if isinstance(refs, dict) else None
+
+    if zattrs is None:
+        return None
+
+    if isinstance(zattrs, str):
+        zattrs = json.loads(zattrs)
+
+    return zattrs
+
+
+class KerchunkHandler(ZarrHandler):
+    """
+    Reads the global attributes from a kerchunk JSON reference set.
+    Only the reference document is read, not the data it points to.
+    JSON files which are not reference sets give no tags.
+    """
+
+    def _read_attrs(self, path):
+
+        if self.whole_file(path, self.header):
+            reference = json.loads(self.header)
+        else:
+            reference = self._load_json(path)
+
+        attrs = get_reference_attrs(reference)
+
+        if attrs is None:
+            logger.debug(f'{path} is not a kerchunk reference set')
+
+        return attrs
+
+
+class ReferenceMetadata(object):
+    """
+    Global attributes for the member files of a dataset, read from a single
+    reference document so the files themselves do not need to be opened.
+
+    The document maps each member path to either its global attributes or
+    its kerchunk reference set. The mapping can be at the top level or
+    under a "files" key:
+
+        {"files": {
+            "2008/file1.nc": {"platform": "NOAA-16", ...},
+            "2008/file2.nc": {"version": 1, "refs": {".zattrs": "...", ...}}
+        }}
+
+    Member paths are either absolute or relative to the dataset directory.
+    """
+
+    def __init__(self, members, root=None):
+        """
+        :param members: Mapping of member path to attributes or reference set (dict)
+        :param root: Dataset directory that relative paths are resolved against
+        :raises ValueError: if a member is not a JSON object
+        """
+        self.root = pathlib.Path(root) if root else None
+        self.source = None
+        self._members = {}
+
+        for path, value in members.items():
+            attrs = get_reference_attrs(value)
+            attrs = value if attrs is None else attrs
+
+            if not isinstance(attrs, dict):
+                raise ValueError(f'Attributes for {path} must be a JSON object, not {type(attrs).__name__}')
+
+            self._members[path] = attrs
+
+    @classmethod
+    def from_file(cls, filepath, root=None):
+        """
+        Load a reference document
+        :param filepath: Path to the reference JSON
+        :param root: Dataset directory that relative paths are resolved against
+        :return: ReferenceMetadata
+        :raises ValueError: if the document is not a mapping of member paths
+        """
+        with open(filepath) as reader:
+            data = json.load(reader)
+
+        if not isinstance(data, dict):
+            raise ValueError(f'{filepath} must contain a JSON object, not {type(data).__name__}')
+
+        if isinstance(data.get('files'), dict):
+            data = data['files']
+
+        reference = cls(data, root=root)
+        reference.source = filepath
+        return reference
+
+    def fingerprint(self):
+        """
+        :return: Identifier which changes when the reference changes (str)
+        """
+        if self.source is not None:
+            stat = os.stat(self.source)
+            return f'{self.source}:{stat.st_size}:{stat.st_mtime_ns}'
+
+        content = json.dumps(self._members, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, filepath):
+        return self._lookup(filepath) is not None
+
+    def _lookup(self, filepath):
+        filepath = pathlib.Path(filepath)
+
+        attrs = self._members.get(filepath.as_posix())
+
+        if attrs is None and self.root is not None:
+            try:
+                attrs = self._members.get(filepath.relative_to(self.root).as_posix())
+            except ValueError:
+                pass
+
+        return attrs
+
+    def get_labels(self, filepath):
+        """
+        Get the tags for a member file in the same form as
+        FileHandler.extract_facet_labels
+
+        :param filepath: Path to the member file
+        :return: tags (dict) | None if the file is not in the reference
+        """
+        attrs = self._lookup(filepath)
+
+        if attrs is None:
+            return None
+
+        return FileHandler.labels_from_attributes(attrs, pathlib.Path(filepath).as_posix())
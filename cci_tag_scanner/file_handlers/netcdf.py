@@ -11,7 +11,7 @@ import logging
 import verboselogs
 
 from .base import FileHandler
-from cci_tag_scanner.conf.constants import PRODUCT_VERSION, ALLOWED_GLOBAL_ATTRS
+from cci_tag_scanner.conf.constants import PRODUCT_VERSION
 
 verboselogs.install()
 logger = logging.getLogger(__name__)
@@ -26,12 +26,20 @@ logger.propagate = False
 
 class NetcdfHandler(FileHandler):
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, header=None):
 
         self.tags = {}
         self.nc_data = None
         self.filepath = filepath.as_posix()
 
+        # Small files may already be fully read while identifying the format
+        if self.whole_file(filepath, header):
+            try:
+                self.nc_data = netCDF4.Dataset(self.filepath, memory=header)
+                return
+            except Exception:
+                logger.debug(f'Could not open {filepath} from memory')
+
         try:
             self.nc_data = netCDF4.Dataset(filepath)
         except Exception as e:
@@ -65,27 +73,7 @@ class NetcdfHandler(FileHandler):
         if self.nc_data:
             logger.debug(f'GLOBAL ATTRS for {self.filepath}')
 
-            for global_attr in ALLOWED_GLOBAL_ATTRS:
-                if global_attr in self.nc_data.ncattrs():
-                    attr = self.nc_data.getncattr(global_attr)
-
-                    self.tags[global_attr] = attr
-
-                    # Verbose logging
-                    logger.debug(f'{global_attr}={attr}')
-                else:
-                    logger.warning(f'Required attr {global_attr} not found in {self.filepath}')
-
-            # Add product version
-            product_version = self.get_product_version()
-
-            if product_version:
-                self.tags[PRODUCT_VERSION] = product_version
+            attrs = {attr: self.nc_data.getncattr(attr) for attr in self.nc_data.ncattrs()}
+            self.tags = self.labels_from_attributes(attrs, self.filepath)
 
         return self.tags
-
-
-
-
-
-
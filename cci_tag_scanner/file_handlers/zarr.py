@@ -0,0 +1,91 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import json
+import logging
+import pathlib
+
+from .base import FileHandler
+from cci_tag_scanner import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Files which mark the root of a Zarr v2 or v3 store
+ZARR_MARKERS = ('.zmetadata', '.zgroup', '.zarray', 'zarr.json')
+
+
+def is_zarr_store(path, filenames=None):
+    """
+    Check whether a directory is the root of a Zarr store.
+
+    :param path: Path to the directory (pathlib.Path)
+    :param filenames: Names of the files in the directory, if already listed
+    :return: bool
+    """
+    if path.suffix == '.zarr':
+        return True
+
+    if filenames is None:
+        return any((path / marker).is_file() for marker in ZARR_MARKERS)
+
+    return any(marker in filenames for marker in ZARR_MARKERS)
+
+
+class ZarrHandler(FileHandler):
+    """
+    Reads the global attributes of a Zarr store from the consolidated
+    metadata (.zmetadata), the root .zattrs or the v3 zarr.json.
+    Chunk data is never read.
+    """
+
+    def __init__(self, filepath, header=None):
+
+        self.attrs = None
+        self.filepath = filepath.as_posix()
+        self.header = header
+
+        try:
+            self.attrs = self._read_attrs(pathlib.Path(filepath))
+        except Exception as e:
+            logger.error(f'Read error. Could not read metadata from: {filepath} with error: {e}')
+
+    @staticmethod
+    def _load_json(path):
+        with open(path) as reader:
+            return json.load(reader)
+
+    def _read_attrs(self, path):
+        """
+        :param path: Path to the store
+        :return: Global attributes (dict)
+        """
+
+        zmetadata = path / '.zmetadata'
+        if zmetadata.is_file():
+            return self._load_json(zmetadata)['metadata'].get('.zattrs', {})
+
+        zattrs = path / '.zattrs'
+        if zattrs.is_file():
+            return self._load_json(zattrs)
+
+        zarr_json = path / 'zarr.json'
+        if zarr_json.is_file():
+            return self._load_json(zarr_json).get('attributes', {})
+
+        raise FileNotFoundError(f'No Zarr metadata found in {path}')
+
+    def extract_facet_labels(self, proc_level):
+
+        if self.attrs is None:
+            return {}
+
+        logger.debug(f'GLOBAL ATTRS for {self.filepath}')
+
+        return self.labels_from_attributes(self.attrs, self.filepath)
@@ -0,0 +1,131 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from abc import ABC, abstractmethod
+import gzip
+import io
+import pathlib
+
+# Writes are collected into a buffer of this size before touching the disk
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Compression is inferred from the output file suffix
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.zst': 'zstd'
+}
+
+
+def open_output(filepath, compression=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Open a text stream for writing with a large write buffer. Compressed
+    streams are supported for gzip and zstd (requires the zstandard package).
+
+    :param filepath: Path to the output file
+    :param compression: 'gzip' | 'zstd' | None. Inferred from the suffix if None
+    :param buffer_size: Size of the write buffer in bytes
+    :return: Text stream
+    """
+
+    if compression is None:
+        compression = COMPRESSION_SUFFIXES.get(pathlib.Path(filepath).suffix)
+
+    if compression is None:
+        return open(filepath, 'w', buffering=buffer_size)
+
+    if compression == 'gzip':
+        raw = gzip.open(filepath, 'wb')
+
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                'zstd compressed output requires the zstandard package. '
+                'Install with: pip install zstandard'
+            )
+        raw = zstandard.ZstdCompressor().stream_writer(open(filepath, 'wb'))
+
+    else:
+        raise ValueError(f'Unknown compression: {compression}')
+
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size), encoding='utf-8')
+
+
+class OutputSink(ABC):
+    """
+    Destination for the outputs of the tagger. A sink receives the MOLES
+    tags for each dataset as they are produced and the DRS to file mapping.
+    Sinks which do not use one of the outputs ignore it.
+    """
+
+    def __init__(self, filepath=None, compression=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        :param filepath: Path to the output file
+        :param compression: 'gzip' | 'zstd' | None. Inferred from the suffix if None
+        :param buffer_size: Size of the write buffer in bytes
+        """
+        self.filepath = filepath
+        self.compression = compression
+        self.buffer_size = buffer_size
+
+        self._stream = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.filepath})'
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        if self.filepath:
+            self._stream = open_output(self.filepath, self.compression, self.buffer_size)
+
+    def flush(self):
+        if self._stream:
+            self._stream.flush()
+
+    def close(self):
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    @abstractmethod
+    def write_moles_tags(self, dataset, uris):
+        """
+        :param dataset: Dataset path
+        :param uris: Iterable of vocabulary URIs for the dataset
+        """
+        return
+
+    @abstractmethod
+    def write_drs(self, drs_items):
+        """
+        :param drs_items: Iterable of (drs id, list of files) pairs. May be
+        called more than once per run.
+        """
+        return
+
+
+class NullSink(OutputSink):
+    """
+    Discards all output. Used when the file output is suppressed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+    def write_moles_tags(self, dataset, uris):
+        return
+
+    def write_drs(self, drs_items):
+        return
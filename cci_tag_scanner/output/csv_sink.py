@@ -0,0 +1,21 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from .base import OutputSink
+
+
+class CSVSink(OutputSink):
+    """
+    Writes the MOLES tags as one dataset,uri line per URI.
+    """
+
+    def write_moles_tags(self, dataset, uris):
+        self._stream.write(''.join(f'{dataset},{uri}\n' for uri in uris))
+
+    def write_drs(self, drs_items):
+        return
@@ -0,0 +1,57 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import json
+
+from .base import OutputSink
+
+
+class JSONSink(OutputSink):
+    """
+    Writes the DRS to file mapping as a single indented JSON object.
+
+    Entries are streamed out as they are received so the whole mapping does
+    not need to be held as one string. The object is closed when the sink is
+    closed.
+    """
+
+    def open(self):
+        super().open()
+        self._entries = 0
+
+    def write_moles_tags(self, dataset, uris):
+        return
+
+    def write_drs(self, drs_items):
+        for drs, files in drs_items:
+            # Strip the enclosing braces so the entry sits at the first indent
+            entry = json.dumps({drs: files}, indent=4, separators=(',', ': '))[2:-2]
+
+            self._stream.write(',\n' if self._entries else '{\n')
+            self._stream.write(entry)
+            self._entries += 1
+
+    def close(self):
+        if self._stream:
+            self._stream.write('\n}' if self._entries else '{}')
+        super().close()
+
+
+class JSONLinesSink(OutputSink):
+    """
+    Writes one JSON record per line. MOLES tags are written as
+    {"dataset": ..., "uris": [...]} and DRS as {"drs": ..., "files": [...]}
+    """
+
+    def write_moles_tags(self, dataset, uris):
+        self._stream.write(json.dumps({'dataset': dataset, 'uris': list(uris)}) + '\n')
+
+    def write_drs(self, drs_items):
+        self._stream.write(''.join(
+            json.dumps({'drs': drs, 'files': files}) + '\n' for drs, files in drs_items
+        ))
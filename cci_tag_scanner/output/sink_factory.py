@@ -0,0 +1,59 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from cci_tag_scanner.conf.settings import ESGF_DRS_FILE, ESGF_DRS_JSONL_FILE, MOLES_TAGS_FILE
+
+
+class SinkFactory(object):
+
+    SINK_MAP = {
+        'csv': 'cci_tag_scanner.output.csv_sink.CSVSink',
+        'json': 'cci_tag_scanner.output.json_sink.JSONSink',
+        'jsonl': 'cci_tag_scanner.output.json_sink.JSONLinesSink',
+        'null': 'cci_tag_scanner.output.base.NullSink'
+    }
+
+    DEFAULT_FILES = {
+        'csv': MOLES_TAGS_FILE,
+        'json': ESGF_DRS_FILE,
+        'jsonl': ESGF_DRS_JSONL_FILE
+    }
+
+    @classmethod
+    def get_sink(cls, fmt):
+
+        sink = cls.SINK_MAP.get(fmt)
+
+        if sink:
+            # pydoc is slow to import, see HandlerFactory
+            from pydoc import locate
+            return locate(sink)
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """
+        Create a sink from a string of the form FORMAT[:PATH]
+        e.g. csv, jsonl:esgf_drs.jsonl.gz
+
+        :param spec: Sink specification (str)
+        :param kwargs: Passed to the sink
+        :return: OutputSink
+        """
+
+        fmt, _, filepath = spec.partition(':')
+
+        sink = cls.get_sink(fmt)
+
+        if not sink:
+            raise ValueError(f'Unknown output format: {fmt}. Expected one of {", ".join(cls.SINK_MAP)}')
+
+        return sink(filepath or cls.DEFAULT_FILES.get(fmt), **kwargs)
+
+    @classmethod
+    def default_sinks(cls):
+        return [cls.from_spec('csv'), cls.from_spec('json')]
@@ -6,5 +6,20 @@ __copyright__ = 'Copyright 2024 United Kingdom Research and Innovation'
 __license__ = 'BSD - see LICENSE file in top-level package directory'
 __contact__ = 'daniel.westwood@stfc.ac.uk'
 
-from .check_json import TestJSONFile
-from .command_line_client import CCITaggerCommandLineClient
\ No newline at end of file
+# Loaded on first use so each script only imports what it needs
+_LAZY = {
+    'TestJSONFile': 'cci_tag_scanner.scripts.check_json',
+    'CCITaggerCommandLineClient': 'cci_tag_scanner.scripts.command_line_client',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    import importlib
+    return getattr(importlib.import_module(_LAZY[name]), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
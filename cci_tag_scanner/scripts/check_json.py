@@ -121,7 +121,7 @@ def test_results(func):
 class TestJSONFile:
 
     REQUIRED_KEYS = {'datasets'}
-    ACCEPTABLE_KEYS = {'datasets', 'filters', 'mappings', 'defaults', 'realisations', 'overrides', 'aggregations'}
+    ACCEPTABLE_KEYS = {'datasets', 'filters', 'mappings', 'defaults', 'realisations', 'overrides', 'aggregations', 'references'}
     FILTER_KEYS = {'pattern','realisation'}
     FACET_KEYS = set(ALL_FACETS)
 
@@ -354,6 +354,37 @@ class TestJSONFile:
 
         return results
 
+    @test_results
+    def test_references(self, results):
+        """
+        Checks the references section and evaluates:
+        - Check references returns a dict
+        - All datasets listed are in the datasets section
+        - Check all reference paths are strings
+        """
+        references = self.data.get('references')
+        if references is None:
+            return results
+
+        # Check references returns a dict
+        if not self._check_type('References', references, dict, results):
+            return results
+
+        # Check all datasets are listed in datasets section
+        reference_datasets = set(references.keys())
+        root_datasets = set(self.data.get('datasets',{}))
+
+        if not reference_datasets.issubset(root_datasets):
+            diff = reference_datasets.difference(root_datasets)
+            results.add_error(f'Unexpected dataset. Reference datasets should match to a dataset specified in datasets section. {diff} does not match')
+
+        # Check all reference paths are strings
+        for dataset, reference in references.items():
+            if not isinstance(reference, str):
+                results.add_error(f'References should be strings. {reference} for {dataset} is not a string')
+
+        return results
+
     @test_results
     def test_overrides(self, results):
         """
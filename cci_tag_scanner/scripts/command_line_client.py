@@ -13,24 +13,38 @@ import sys
 import time
 import logging
 import verboselogs
-import os
 
-from cci_tag_scanner.conf.settings import ERROR_FILE, LOG_FORMAT
-from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner import formatter
+from cci_tag_scanner.conf.settings import ERROR_FILE, LOG_FORMAT, RESULT_CACHE_DIR
+from cci_tag_scanner.utils.locality import LOCALITY_KEYS
+from cci_tag_scanner.utils.telemetry import METRICS_FORMATS
+
+# The tagger and the modules it loads (numpy, requests, netCDF4) are imported
+# in main so --help and argument errors return straight away
 
 verboselogs.install()
 logger = logging.getLogger()
 
-if not os.path.isfile(ERROR_FILE):
-    os.system(f'touch {ERROR_FILE}')
 
-# Set up ERROR file log handler
-fh = logging.FileHandler(ERROR_FILE)
-fh.setLevel(logging.ERROR)
-LOG_FORMATTER = logging.Formatter(LOG_FORMAT)
-fh.setFormatter(LOG_FORMATTER)
+def setup_logging(verbosity):
+    """
+    Log to the console at the level set by the verbosity and write errors
+    to the ERROR file
+    :param verbosity: Number of -v flags
+    """
+    level = get_logging_level(verbosity)
+    logger.setLevel(level)
+
+    console = logging.StreamHandler()
+    console.setLevel(level)
+    console.setFormatter(formatter)
+    logger.addHandler(console)
+
+    fh = logging.FileHandler(ERROR_FILE)
+    fh.setLevel(logging.ERROR)
+    fh.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(fh)
 
-logger.addHandler(fh)
 
 def get_logging_level(verbosity):
 
@@ -99,6 +113,7 @@ class CCITaggerCommandLineClient(object):
             '-v'
             '\n  moles_esgf_tag -f datapath --file_count 2 -v'
             '\n  moles_esgf_tag -j example.json -v'
+            '\n  moles_esgf_tag -f datapath -o csv -o jsonl:esgf_drs.jsonl.gz'
             '\n  moles_esgf_tag -s',
             formatter_class=RawDescriptionHelpFormatter)
 
@@ -133,6 +148,139 @@ class CCITaggerCommandLineClient(object):
             type=str, default=None
         )
         
+        parser.add_argument(
+            '-o', '--output',
+            action='append',
+            help=('Output to write as FORMAT[:PATH]. Formats: csv, json, jsonl, null. '
+                  'Compressed with gzip or zstd if PATH ends .gz or .zst. Can be given '
+                  'more than once. Default: csv:moles_tags.csv and json:esgf_drs.json')
+        )
+
+        parser.add_argument(
+            '--scan-timeout',
+            help=('seconds allowed to read the metadata from each file. Files are read in a '
+                  'worker process and any which time out or crash it are retried at the end '
+                  'of the dataset, then tagged without file metadata'),
+            type=float, default=None
+        )
+
+        parser.add_argument(
+            '--scan-order',
+            help=('order to scan the files of each dataset in. "directory" and "inode" scan '
+                  'each directory in one pass, which suits parallel filesystems. '
+                  'Default: %(default)s'),
+            choices=list(LOCALITY_KEYS), default='walk'
+        )
+
+        parser.add_argument(
+            '--prefetch',
+            help=('number of file headers to read ahead of the file being parsed. The depth '
+                  'and read size adapt to the observed latency. Ignored with --scan-timeout, '
+                  'where the worker process reads each file itself. 0 disables. Default: %(default)s'),
+            type=int, default=0
+        )
+
+        parser.add_argument(
+            '--result-cache',
+            help=('reuse the results of datasets whose files, mapping and ontology have not changed. '
+                  'Optionally give the cache directory. Default directory: %(const)s'),
+            nargs='?', const=RESULT_CACHE_DIR, default=None, metavar='DIR'
+        )
+
+        parser.add_argument(
+            '--attribute-store',
+            help=('SQLite file to record the tags read from each file in. '
+                  'Needed for --retag'),
+            metavar='PATH', default=None
+        )
+
+        parser.add_argument(
+            '--retag',
+            help=('rebuild the tags from the attribute store without reading any files. '
+                  'Use after a change to the ontology or the JSON mappings'),
+            action='store_true'
+        )
+
+        parser.add_argument(
+            '--spill-threshold',
+            help=('number of files to hold in the DRS to file mapping before writing it out to a '
+                  'temporary segment, merged when the DRS output is written. 0 never spills. '
+                  'Default: %(default)s'),
+            type=int, default=0, metavar='FILES'
+        )
+
+        parser.add_argument(
+            '--spill-dir',
+            help='directory for the temporary segments. Default: system temporary directory',
+            default=None, metavar='DIR'
+        )
+
+        parser.add_argument(
+            '--progress',
+            help='show a progress bar with files/sec, size of the files tagged, datasets done and ETA',
+            action='store_true'
+        )
+
+        parser.add_argument(
+            '--metrics-file',
+            help=('file to rewrite the run counters and cache hit rates to every --metrics-interval '
+                  'seconds, for example in the node exporter textfile directory'),
+            default=None, metavar='PATH'
+        )
+
+        parser.add_argument(
+            '--metrics-format',
+            help='format of --metrics-file. Default: %(default)s',
+            choices=METRICS_FORMATS, default='prom'
+        )
+
+        parser.add_argument(
+            '--metrics-interval',
+            help='seconds between rewrites of --metrics-file. Default: %(default)s',
+            type=float, default=30, metavar='SECONDS'
+        )
+
+        parser.add_argument(
+            '--summary',
+            help='write a JSON summary of the run to this file when it finishes',
+            default=None, metavar='PATH'
+        )
+
+        parser.add_argument(
+            '--profile',
+            help=('time each file, split into I/O and CPU time. Writes latency.json to DIR and '
+                  'prints the slowest files and datasets. Default DIR: %(const)s'),
+            nargs='?', const='profile', default=None, metavar='DIR'
+        )
+
+        parser.add_argument(
+            '--profile-functions',
+            help=('also run under cProfile and write profile.pstats and profile.txt to the --profile '
+                  'DIR. Adds overhead to every Python call, which inflates the CPU time of files '
+                  'that are expensive to parse'),
+            action='store_true'
+        )
+
+        parser.add_argument(
+            '--profile-top',
+            help='number of slowest files and datasets to report with --profile. Default: %(default)s',
+            type=int, default=20, metavar='N'
+        )
+
+        parser.add_argument(
+            '--watch',
+            help=('keep running and tag new or modified files in the datasets as they arrive. '
+                  'Uses inotify if the inotify_simple package is installed, otherwise polls. '
+                  'Existing files are not tagged. Use with a jsonl or csv output'),
+            action='store_true'
+        )
+
+        parser.add_argument(
+            '--poll-interval',
+            help='seconds between checks for new files in --watch mode. Default: %(default)s',
+            type=float, default=10
+        )
+
         parser.add_argument(
             '-v', '--verbose', action='count',
             help='increase output verbosity',
@@ -142,6 +290,11 @@ class CCITaggerCommandLineClient(object):
         args = parser.parse_args()
         datasets = None
 
+        if args.retag and not args.attribute_store:
+            parser.error('--retag needs --attribute-store')
+
+        setup_logging(args.verbose)
+
         start_time = time.strftime("%H:%M:%S")
 
         # Read datasets from the command line
@@ -187,9 +340,44 @@ class CCITaggerCommandLineClient(object):
         else:
             json_file = None
 
+        from cci_tag_scanner.tagger import ProcessDatasets
+        from cci_tag_scanner.utils.profiling import RunProfiler
+        from cci_tag_scanner.utils.telemetry import RunTelemetry
+        from cci_tag_scanner.watch import watch
+
+        telemetry = None
+        if args.progress or args.metrics_file or args.summary:
+            telemetry = RunTelemetry(progress=args.progress, metrics_file=args.metrics_file,
+                                     metrics_format=args.metrics_format,
+                                     interval=args.metrics_interval, summary_file=args.summary)
+
+        profiler = None
+        if args.profile or args.profile_functions:
+            profiler = RunProfiler(args.profile_top, functions=args.profile_functions)
+
         logger.info('Starting dataset process')
-        pds = ProcessDatasets(json_files=json_file, ontology_local=args.ontology)
-        pds.process_datasets(datasets, args.file_count)
+        pds = ProcessDatasets(json_files=json_file, ontology_local=args.ontology,
+                              output_sinks=args.output, scan_timeout=args.scan_timeout,
+                              scan_order=args.scan_order, prefetch=args.prefetch,
+                              result_cache=args.result_cache,
+                              attribute_store=args.attribute_store,
+                              spill_threshold=args.spill_threshold, spill_dir=args.spill_dir,
+                              telemetry=telemetry, profiler=profiler)
+
+        if args.watch:
+            try:
+                watch(pds, sorted(datasets), interval=args.poll_interval)
+            finally:
+                pds.close()
+            exit(0)
+
+        if profiler is not None:
+            profiler.run(pds.process_datasets, datasets, args.file_count, retag=args.retag)
+            print(profiler.format_report())
+            for path in profiler.write(args.profile or 'profile'):
+                print(f'Wrote {path}')
+        else:
+            pds.process_datasets(datasets, args.file_count, retag=args.retag)
 
         if logger.level <= logging.INFO:
             logger.info(f'{time.strftime("%H:%M:%S")} FINISHED\n\n')
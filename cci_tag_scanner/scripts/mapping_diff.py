@@ -0,0 +1,105 @@
+# encoding: utf-8
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import argparse
+import glob
+import os
+import sys
+
+from cci_tag_scanner.utils.dataset_jsons import DatasetJSONMappings
+
+ADDED = 'added'
+REMOVED = 'removed'
+
+
+def load_mappings(path):
+    """
+    :param path: Directory of JSON files, searched recursively, or a single JSON file
+    :return: DatasetJSONMappings
+    """
+    if os.path.isdir(path):
+        json_files = glob.glob(f'{os.path.abspath(path)}/**/*.json', recursive=True)
+    else:
+        json_files = [path]
+
+    return DatasetJSONMappings(json_files)
+
+
+def compare_mappings(old, new):
+    """
+    Find the datasets whose tagging settings differ between two mapping trees
+
+    :param old: DatasetJSONMappings
+    :param new: DatasetJSONMappings
+    :return: dataset -> changed sections, or ["added"] / ["removed"] (dict)
+    """
+    old_datasets = set(old.datasets())
+    new_datasets = set(new.datasets())
+
+    changes = {}
+
+    for dataset in sorted(old_datasets | new_datasets):
+        if dataset not in old_datasets:
+            changes[dataset] = [ADDED]
+            continue
+
+        if dataset not in new_datasets:
+            changes[dataset] = [REMOVED]
+            continue
+
+        old_settings = old.get_dataset_settings(dataset)
+        new_settings = new.get_dataset_settings(dataset)
+
+        sections = [section for section in new_settings if old_settings.get(section) != new_settings[section]]
+
+        if sections:
+            changes[dataset] = sections
+
+    return changes
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description=('List the datasets whose tagging is affected by a change to the JSON mappings. '
+                     'The output can be passed to moles_esgf_tag -f'),
+        epilog='Example: cci_mapping_diff old_jsons/ new_jsons/ -o changed.txt && moles_esgf_tag -f changed.txt -j ...'
+    )
+    parser.add_argument('old', help='Old version: directory of JSON files or a single JSON file')
+    parser.add_argument('new', help='New version: directory of JSON files or a single JSON file')
+    parser.add_argument('-o', '--output', help='File to write the datasets to. Default: stdout')
+    parser.add_argument('--include-removed', action='store_true',
+                        help='Also list datasets which are no longer in the mappings')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print the changed sections for each dataset to stderr')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    changes = compare_mappings(load_mappings(args.old), load_mappings(args.new))
+
+    datasets = [
+        dataset for dataset, sections in changes.items()
+        if args.include_removed or sections != [REMOVED]
+    ]
+
+    if args.verbose:
+        for dataset, sections in changes.items():
+            print(f'{dataset}: {", ".join(sections)}', file=sys.stderr)
+
+    output = ''.join(f'{dataset}\n' for dataset in datasets)
+
+    if args.output:
+        with open(args.output, 'w') as writer:
+            writer.write(output)
+    else:
+        sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+    main()
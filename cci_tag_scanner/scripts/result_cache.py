@@ -0,0 +1,77 @@
+# encoding: utf-8
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import argparse
+from datetime import datetime
+
+from cci_tag_scanner.conf.settings import RESULT_CACHE_DIR
+from cci_tag_scanner.utils.result_cache import ResultCache
+
+DAY = 24 * 3600
+MB = 1024 * 1024
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Manage the dataset result cache used by moles_esgf_tag --result-cache')
+    parser.add_argument('--cache-dir', help='Cache directory. Default: %(default)s', default=RESULT_CACHE_DIR)
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    info = subparsers.add_parser('info', help='Show the size of the cache')
+    info.add_argument('-l', '--list', action='store_true', help='List the cached datasets')
+
+    evict = subparsers.add_parser('evict', help='Remove old entries')
+    evict.add_argument('--older-than', type=float, help='Remove entries not used for this many days')
+    evict.add_argument('--max-size', type=float, help='Remove the least recently used entries until the cache is under this many MB')
+
+    subparsers.add_parser('clear', help='Remove all entries')
+
+    return parser.parse_args()
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M') if timestamp else '-'
+
+
+def main():
+    args = get_args()
+    cache = ResultCache(args.cache_dir)
+
+    if args.command == 'info':
+        entries = cache.entries()
+        size = sum(entry.size for entry in entries)
+
+        print(f'Cache: {cache.cache_dir}')
+        print(f'Entries: {len(entries)}')
+        print(f'Size: {size / MB:.1f} MB')
+
+        if entries:
+            print(f'Least recently used: {_format_time(entries[0].last_used)}')
+            print(f'Most recently used: {_format_time(entries[-1].last_used)}')
+
+        if args.list:
+            for entry in entries:
+                print(f'{_format_time(entry.last_used)}  {entry.size / 1024:8.1f} KB  {entry.dataset}')
+
+    elif args.command == 'evict':
+        if args.older_than is None and args.max_size is None:
+            print('Nothing to do. Give --older-than and/or --max-size')
+            return
+
+        removed = cache.evict(
+            older_than=args.older_than * DAY if args.older_than is not None else None,
+            max_bytes=args.max_size * MB if args.max_size is not None else None
+        )
+        print(f'Removed {len(removed)} entries ({sum(entry.size for entry in removed) / MB:.1f} MB)')
+
+    elif args.command == 'clear':
+        removed = cache.clear()
+        print(f'Removed {len(removed)} entries')
+
+
+if __name__ == '__main__':
+    main()
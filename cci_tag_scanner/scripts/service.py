@@ -0,0 +1,63 @@
+# encoding: utf-8
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import argparse
+import logging
+
+from cci_tag_scanner.service import TaggingService, make_server, logger
+from cci_tag_scanner.tagger import ProcessDatasets
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Keep a tagger loaded and tag files sent to it over HTTP. '
+                    'POST {"files": [...]} to /tag. GET /health and /metrics for monitoring'
+    )
+    parser.add_argument('-j', '--json_file', action='append',
+                        help='JSON mapping file to load. Can be given more than once')
+    parser.add_argument('--ontology', help='Path to local ontology file', default=None)
+    parser.add_argument('--host', help='Address to listen on. Default: %(default)s', default='127.0.0.1')
+    parser.add_argument('--port', help='Port to listen on. Default: %(default)s', type=int, default=8080)
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of a TCP port', default=None)
+    parser.add_argument('--batch-window', type=float, default=0.05,
+                        help='seconds to collect concurrent requests for before tagging them '
+                             'together. Default: %(default)s')
+    parser.add_argument('--max-batch', type=int, default=1000,
+                        help='maximum number of files to tag in one batch. Default: %(default)s')
+    parser.add_argument('--scan-timeout', type=float, default=None,
+                        help='seconds allowed to read the metadata from each file')
+    parser.add_argument('-v', '--verbose', action='count', default=0, help='increase output verbosity')
+
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    if args.verbose:
+        logger.setLevel(logging.DEBUG if args.verbose > 1 else logging.INFO)
+
+    pds = ProcessDatasets(suppress_file_output=True, json_files=args.json_file,
+                          ontology_local=args.ontology, scan_timeout=args.scan_timeout)
+
+    service = TaggingService(pds, batch_window=args.batch_window, max_batch=args.max_batch)
+    server = make_server(service, args.host, args.port, args.socket)
+
+    print(f'Listening on {args.socket or f"http://{args.host}:{server.server_address[1]}"}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        pds.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cci_tag_scanner import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+def tagged_to_json(fpath, tagged):
+    """
+    JSON form of the TaggedDataset for a file
+    :param fpath: Path to the file
+    :param tagged: TaggedDataset
+    :return: dict
+    """
+    return {
+        'file': fpath,
+        'drs': tagged.drs,
+        'labels': tagged.labels,
+        'uris': {facet: sorted(uris) for facet, uris in tagged.uris.items()},
+    }
+
+
+class LatencyStats(object):
+    """
+    Request counts and the latency of the most recent requests
+    """
+
+    def __init__(self, window=1000):
+        """
+        :param window: Number of recent latencies to keep
+        """
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.files = 0
+        self.errors = 0
+        self.batches = 0
+
+    def record_batch(self, n_requests, n_files):
+        with self._lock:
+            self.batches += 1
+            self.requests += n_requests
+            self.files += n_files
+
+    def record_request(self, seconds, error=False):
+        with self._lock:
+            self._latencies.append(seconds)
+            if error:
+                self.errors += 1
+
+    def as_dict(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'uptime': time.time() - self.started,
+                'requests': self.requests,
+                'files': self.files,
+                'batches': self.batches,
+                'errors': self.errors,
+                'mean_batch_files': self.files / self.batches if self.batches else 0,
+            }
+
+        if latencies:
+            stats['latency'] = {
+                'mean': sum(latencies) / len(latencies),
+                'p50': latencies[len(latencies) // 2],
+                'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                'max': latencies[-1],
+            }
+
+        return stats
+
+
+class TaggingService(object):
+    """
+    Tags files with one warm ProcessDatasets. Requests from concurrent
+    clients are collected for up to batch_window seconds and tagged together
+    so files from the same dataset share one Dataset and filename parse.
+
+    ProcessDatasets is not thread safe, so all tagging happens on a single
+    batching thread.
+    """
+
+    def __init__(self, tagger, batch_window=0.05, max_batch=1000):
+        """
+        :param tagger: ProcessDatasets
+        :param batch_window: Seconds to wait for more requests before tagging a batch
+        :param max_batch: Maximum number of files to tag in one batch
+        """
+        self.tagger = tagger
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = LatencyStats()
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='tagging-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, fpaths):
+        """
+        Queue files to be tagged
+        :param fpaths: Paths of the files (list of str)
+        :return: Future of a list of TaggedDataset, in the same order as fpaths
+        """
+        future = Future()
+        self._queue.put((list(fpaths), future))
+        return future
+
+    def tag(self, fpaths, timeout=None):
+        """
+        Tag files and wait for the result
+        :param fpaths: Paths of the files (list of str)
+        :param timeout: Seconds to wait
+        :return: list of TaggedDataset
+        """
+        return self.submit(fpaths).result(timeout)
+
+    def close(self):
+        """
+        Finish the queued requests and stop the batching thread
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        n_files = len(first[0])
+        deadline = time.monotonic() + self.batch_window
+
+        while n_files < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if request is None:
+                # Tag what has arrived, then stop
+                self._queue.put(None)
+                break
+
+            batch.append(request)
+            n_files += len(request[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            self.stats.record_batch(len(batch), sum(len(fpaths) for fpaths, _ in batch))
+
+            try:
+                self._tag_batch(batch)
+            except Exception as e:
+                # Tag each request on its own so one bad file only fails its request
+                logger.warning(f'Batch of {len(batch)} requests failed: {e}. Retrying individually')
+                for request in batch:
+                    self._tag_batch([request])
+
+    def _tag_batch(self, batch):
+        if len(batch) == 1:
+            fpaths, future = batch[0]
+            try:
+                future.set_result(list(self.tagger.get_files_tags(fpaths)))
+            except Exception as e:
+                future.set_exception(e)
+            return
+
+        # Files are grouped by directory so consecutive files share a Dataset
+        fpaths = sorted({fpath for request_paths, _ in batch for fpath in request_paths})
+        results = dict(zip(fpaths, self.tagger.get_files_tags(fpaths)))
+
+        for request_paths, future in batch:
+            future.set_result([results[fpath] for fpath in request_paths])
+
+
+class TaggingRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /tag     {"files": [...]} -> {"results": [{"file", "drs", "labels", "uris"}, ...]}
+    GET  /health  -> {"status": "ok"}
+    GET  /metrics -> request counts and latency
+    """
+
+    server_version = 'cci-tag-service'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'pid': os.getpid()})
+        elif self.path == '/metrics':
+            self._send_json(200, self.server.service.stats.as_dict())
+        else:
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/tag':
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        start = time.monotonic()
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            fpaths = body['files']
+            if isinstance(fpaths, str) or not all(isinstance(f, str) for f in fpaths):
+                raise TypeError('"files" must be a list of paths')
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'Bad request: {e}'})
+            return
+
+        service = self.server.service
+
+        try:
+            tagged = service.tag(fpaths)
+        except Exception as e:
+            logger.error(f'Failed to tag {len(fpaths)} files: {e}')
+            service.stats.record_request(time.monotonic() - start, error=True)
+            self._send_json(500, {'error': str(e)})
+            return
+
+        service.stats.record_request(time.monotonic() - start)
+        self._send_json(200, {'results': [tagged_to_json(f, t) for f, t in zip(fpaths, tagged)]})
+
+    def _send_json(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f'{self.address_string()} {format % args}')
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=8080, socket_path=None):
+    """
+    HTTP server for a TaggingService, on a TCP port or a Unix socket
+    :param service: TaggingService
+    :param host: Address to listen on
+    :param port: Port to listen on. 0 picks a free port
+    :param socket_path: Listen on this Unix socket instead of a TCP port
+    :return: socketserver.BaseServer
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, TaggingRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), TaggingRequestHandler)
+
+    server.service = service
+    return server
@@ -10,13 +10,19 @@ import json
 
 from cci_tag_scanner.conf.constants import ALLOWED_GLOBAL_ATTRS, SINGLE_VALUE_FACETS
 from cci_tag_scanner.facets import Facets
-from cci_tag_scanner.conf.settings import ESGF_DRS_FILE, MOLES_TAGS_FILE
+from cci_tag_scanner.file_handlers.isolation import IsolatedScanner
+from cci_tag_scanner.output.base import NullSink
+from cci_tag_scanner.output.sink_factory import SinkFactory
 from cci_tag_scanner.utils.dataset_jsons import DatasetJSONMappings
 from cci_tag_scanner.dataset import Dataset
 from cci_tag_scanner.utils import TaggedDataset
+from cci_tag_scanner.utils.attribute_store import AttributeStore
+from cci_tag_scanner.utils.cache import LRUCache
+from cci_tag_scanner.utils.result_cache import ResultCache
+from cci_tag_scanner.utils.spill import SpillingMapping
+from itertools import groupby, islice
 import logging
 import verboselogs
-import json
 
 verboselogs.install()
 
@@ -81,7 +87,10 @@ class ProcessDatasets(object):
 
     def __init__(self, suppress_file_output=False,
                  json_files=None, facet_json=None, 
-                 ontology_local=None,**kwargs):
+                 ontology_local=None, output_sinks=None,
+                 dataset_cache_size=128, scan_timeout=None, scan_order=None,
+                 prefetch=0, result_cache=None, attribute_store=None,
+                 spill_threshold=0, spill_dir=None, telemetry=None, profiler=None, **kwargs):
         """
         Initialise the ProcessDatasets class.
 
@@ -89,10 +98,35 @@ class ProcessDatasets(object):
         @param json_files (iterable): collection of JSON files to load
         @param facet_json (string): filepath to JSON file which contains a dump of the facet object
                 to save time when loading the tagger
+        @param output_sinks (iterable): OutputSink objects or FORMAT[:PATH] strings
+                to write the outputs to. Defaults to moles_tags.csv and esgf_drs.json
+        @param dataset_cache_size (int): number of Dataset objects to keep for reuse. 0 disables
+        @param scan_timeout (float): seconds allowed to read the metadata from each file. When
+                set, files are read in a worker subprocess so a hung read or a crash only
+                fails that file. Default: read in this process with no limit
+        @param scan_order (string | callable): order to scan the files of each dataset in. One of
+                "walk", "directory" or "inode", or a locality key function. See
+                utils.locality.order_by_locality. Default: the order they are found
+        @param prefetch (int): number of file headers to start reading ahead of the file being
+                parsed. Adapts to the read latency as the scan runs. 0 disables. Not used
+                with scan_timeout, as the worker subprocess reads each file itself
+        @param result_cache (string | ResultCache): directory to cache the results of each dataset
+                in. Datasets whose files, mapping and ontology are unchanged are not scanned again.
+                Default: no caching
+        @param attribute_store (string | AttributeStore): SQLite file to record the raw tags of every
+                scanned file in, so datasets can be retagged without reading the files.
+        @param spill_threshold (int): number of files to hold in the DRS to file mapping before
+                writing it out to a temporary segment. The segments are merged when the DRS
+                outputs are written. 0 keeps the whole mapping in memory
+        @param spill_dir (string): directory for the temporary segments. Default: system temp
+        @param telemetry (RunTelemetry): progress display, metrics file and run summary for
+                process_datasets. Default: none
+        @param profiler (RunProfiler): records the time taken to tag each file. Default: none
 
         """
         self.logger = logging.getLogger(__name__)
         self.__suppress_fo = suppress_file_output
+        self.__sinks = self._get_sinks(output_sinks)
 
         if facet_json and False:
             with open(facet_json, 'r') as reader:
@@ -101,12 +135,23 @@ class ProcessDatasets(object):
         else:
             self.__facets = Facets(endpoint=ontology_local)
 
-        self.__file_drs = None
-        self.__file_csv = None
         self._open_files()
         self.__not_found_messages = set()
         self.__error_messages = set()
         self.__dataset_json_values = DatasetJSONMappings(json_files)
+        self.__dataset_cache = LRUCache(dataset_cache_size)
+        self.__scanner = IsolatedScanner(scan_timeout) if scan_timeout else None
+        self.__scan_order = scan_order
+        self.__prefetch = prefetch
+        self.__result_cache = self._get_result_cache(result_cache)
+        self.__attribute_store = AttributeStore(attribute_store) if isinstance(attribute_store, str) else attribute_store
+        self.__spill_threshold = spill_threshold
+        self.__spill_dir = spill_dir
+        self.__telemetry = telemetry
+        self.__profiler = profiler
+
+        if telemetry is not None and telemetry.cache_info is None:
+            telemetry.cache_info = self.cache_info
 
     def _check_property_value(self, value, labels, facet, defaults_source):
         if value not in labels:
@@ -125,9 +170,73 @@ class ProcessDatasets(object):
         """
 
         dataset_id = self.__dataset_json_values.get_dataset(dspath)
-        return Dataset(dataset_id, self.__dataset_json_values, self.__facets)
+        return self._get_dataset_from_id(dataset_id)
+
+    def _get_dataset_from_id(self, dataset_id):
+        """
+        Return a dataset object for a resolved dataset id. Dataset objects
+        are cached and reset before being handed out again.
+        :param dataset_id: Dataset id from DatasetJSONMappings.get_dataset
+        :return: Dataset
+        """
+        dataset = self.__dataset_cache.get(dataset_id)
+
+        if dataset is None:
+            dataset = Dataset(dataset_id, self.__dataset_json_values, self.__facets)
+            dataset.scanner = self.__scanner
+            dataset.scan_order = self.__scan_order
+            dataset.prefetch = self.__prefetch
+            dataset.result_cache = self.__result_cache
+            dataset.attribute_store = self.__attribute_store
+            dataset.telemetry = self.__telemetry
+            dataset.profiler = self.__profiler
+            self.__dataset_cache.put(dataset_id, dataset)
+        else:
+            dataset.reset()
+
+        return dataset
+
+    def dataset_cache_info(self):
+        """
+        :return: hits, misses, maxsize and currsize of the Dataset cache (CacheInfo)
+        """
+        return self.__dataset_cache.info()
+
+    def cache_info(self):
+        """
+        :return: {name: CacheInfo} of the Dataset, dataset resolution and result caches.
+                The result cache is None if not enabled
+        """
+        return {
+            'dataset': self.dataset_cache_info(),
+            'resolution': self.__dataset_json_values.resolution_cache_info(),
+            'result': self.result_cache_info(),
+        }
+
+    def _get_result_cache(self, result_cache):
+        """
+        :param result_cache: Cache directory, ResultCache or None
+        :return: ResultCache | None
+        """
+        if result_cache is None:
+            return None
+
+        if not isinstance(result_cache, ResultCache):
+            result_cache = ResultCache(result_cache)
+
+        if not result_cache.ontology_fingerprint:
+            result_cache.ontology_fingerprint = self.__facets.fingerprint()
+
+        return result_cache
 
-    def process_datasets(self, datasets, max_file_count=0):
+    def result_cache_info(self):
+        """
+        :return: hits and misses of the dataset result cache (CacheInfo) | None if not enabled
+        """
+        if self.__result_cache is not None:
+            return self.__result_cache.info()
+
+    def process_datasets(self, datasets, max_file_count=0, retag=False):
         """
         Loop through the datasets pulling out data from file names and from
         within net cdf files.
@@ -137,26 +246,44 @@ class ProcessDatasets(object):
         @param max_file_count (int): how many .nc files to look at per dataset.
                 If the value is less than 1 then all datasets will be
                 processed.
+        @param retag (boolean): rebuild the tags from the attribute store
+                instead of reading the files. Use after a change to the
+                ontology or the JSON mappings.
 
         """
+        if retag and self.__attribute_store is None:
+            raise ValueError('Retagging needs an attribute store')
 
         ds_len = len(datasets)
         self.logger.info(f'Processing a maximum of {max_file_count if max_file_count > 0 else "unlimited"} files for each of {ds_len} datasets')
 
         # A sanity check to let you see what files are being included in each dataset
-        dataset_file_mapping = {}
+        dataset_file_mapping = SpillingMapping(self.__spill_threshold, self.__spill_dir)
         terms_not_found = set()
+        failed_files = []
+
+        telemetry = self.__telemetry
+        if telemetry is not None:
+            telemetry.start(ds_len)
 
         errcount = 0
         for dspath in sorted(datasets):
 
             dataset = self.get_dataset(dspath)
 
-            dataset_uris, ds_file_map = dataset.process_dataset(max_file_count)
+            if telemetry is not None:
+                telemetry.start_dataset(dataset.id)
+
+            if retag:
+                dataset_uris, ds_file_map = dataset.retag_dataset()
+            else:
+                dataset_uris, ds_file_map = dataset.process_dataset(max_file_count)
 
             if dataset_uris is None:
                 self.logger.error(f'Skipped {dspath} - no associated data identified')
                 errcount += 1
+                if telemetry is not None:
+                    telemetry.dataset_done(dataset.id, skipped=True)
                 continue
 
             self._write_moles_tags(dataset.id, dataset_uris)
@@ -165,15 +292,35 @@ class ProcessDatasets(object):
 
             terms_not_found.update(dataset.not_found_messages)
 
+            failed_files.extend(dataset.failed_files)
+
+            if telemetry is not None:
+                telemetry.terms_not_found = len(terms_not_found)
+                telemetry.dataset_done(dataset.id, failed_files=len(dataset.failed_files))
+
+            # Only the copy in the mapping is kept, it may be spilled to disk
+            dataset.reset()
+
         self.logger.info(f'{ds_len} Datasets: {errcount} failed')
 
-        self._write_json(dataset_file_mapping)
+        try:
+            self._write_drs_items(dataset_file_mapping.items())
+        finally:
+            dataset_file_mapping.close()
+
+        if telemetry is not None:
+            telemetry.close()
 
         if len(terms_not_found) > 0:
             print("\nSUMMARY OF TERMS NOT IN THE VOCAB:\n")
             for message in sorted(terms_not_found):
                 print(message)
 
+        if failed_files:
+            print("\nFILES TAGGED WITHOUT FILE METADATA (SCAN FAILED):\n")
+            for filepath in failed_files:
+                print(filepath)
+
         self._close_files()
 
     def get_file_tags(self, fpath):
@@ -190,6 +337,84 @@ class ProcessDatasets(object):
 
         # Get the URIs for the datset
         uris = dataset.get_file_tags(filepath=fpath)
+
+        return self._get_tagged_dataset(dataset, fpath, uris)
+
+    def get_files_tags(self, fpaths, batch_size=1000):
+        """
+        Batch version of get_file_tags.
+        USED BY THE FACET SCANNER FOR THE CCI PROJECT
+
+        Consecutive paths which resolve to the same dataset share one Dataset
+        object and have their filenames parsed together, so passing the paths
+        grouped by directory gives the most reuse.
+        :param fpaths: Paths of the files to scan (iterable)
+        :param batch_size: Maximum number of files to tag with one Dataset
+        :return: generator of TaggedDataset, in the same order as fpaths
+        """
+
+        for dataset_id, group in groupby(fpaths, key=lambda f: self.__dataset_json_values.get_dataset(str(f))):
+
+            dataset = self._get_dataset_from_id(dataset_id)
+            self.logger.debug(f'Obtained dataset {dataset_id}')
+
+            while True:
+                batch = list(islice(group, batch_size))
+                if not batch:
+                    break
+
+                for fpath, uris in zip(batch, dataset.get_files_tags(batch)):
+                    yield self._get_tagged_dataset(dataset, fpath, uris)
+
+    def tag_files(self, fpaths):
+        """
+        Tag individual files and write the results to the outputs straight
+        away. Used to tag files as they arrive.
+
+        :param fpaths: Paths of the files to tag (iterable)
+        :return: list of TaggedDataset, in the same order as fpaths
+        """
+        fpaths = [str(f) for f in fpaths]
+        tagged = list(self.get_files_tags(fpaths))
+
+        dataset_uris = {}
+        drs_files = {}
+
+        for fpath, tagged_file in zip(fpaths, tagged):
+            dataset_id = self.__dataset_json_values.get_dataset(fpath)
+
+            uris = dataset_uris.setdefault(dataset_id, {})
+            for facet, values in tagged_file.uris.items():
+                uris.setdefault(facet, set()).update(values)
+
+            # Create a value where the DRS cannot be created
+            drs = tagged_file.drs or f'UNKNOWN_DRS - {dataset_id}'
+            drs_files.setdefault(drs, []).append(fpath)
+
+        for dataset_id, uris in dataset_uris.items():
+            self._write_moles_tags(dataset_id, uris)
+
+        self._write_json(drs_files)
+
+        for sink in self.__sinks:
+            sink.flush()
+
+        return tagged
+
+    def close(self):
+        """
+        Close the outputs. Only needed after tag_files, process_datasets closes them itself
+        """
+        self._close_files()
+
+    def _get_tagged_dataset(self, dataset, fpath, uris):
+        """
+        Turn the URIs for a file into labels and a DRS id
+        :param dataset: Dataset the file belongs to
+        :param fpath: Path to the file
+        :param uris: URIs from Dataset.get_file_tags (dict)
+        :return: TaggedDataset
+        """
         self.logger.debug(f'Obtained {len(uris)} uris for {fpath}')
         self.logger.info(f'URIs: {uris}')
 
@@ -227,35 +452,64 @@ class ProcessDatasets(object):
 
     def _write_moles_tags_out(self, ds, uris):
 
-        if self.__suppress_fo:
-            return
-        else:
-            for uri in uris:
-                self.__file_csv.write(f'{ds},{uri}\n')
+        for sink in self.__sinks:
+            sink.write_moles_tags(ds, uris)
 
     def _write_json(self, drs):
-        if self.__suppress_fo:
-            return
 
-        self.__file_drs.write(
-            json.dumps(drs, sort_keys=True, indent=4, separators=(',', ': ')))
+        self._write_drs_items(sorted(drs.items()))
 
-    def _open_files(self, ):
-        # Do not open files if suppress output is true
+    def _write_drs_items(self, drs_items, chunk_size=1000):
+        """
+        Write the DRS to file mapping to all the sinks. The items are only
+        iterated once, so a merged SpillingMapping is read back once.
+        :param drs_items: (drs, files) in DRS order (iterable)
+        :param chunk_size: Number of items to pass to the sinks at a time
+        """
+        drs_items = iter(drs_items)
+
+        while True:
+            chunk = list(islice(drs_items, chunk_size))
+            if not chunk:
+                break
+
+            for sink in self.__sinks:
+                sink.write_drs(chunk)
+
+    def _get_sinks(self, output_sinks):
+        """
+        Get the list of sinks to write the outputs to
+        :param output_sinks: OutputSink objects or FORMAT[:PATH] strings
+        :return: list of OutputSink
+        """
+
+        # Do not write files if suppress output is true
         if self.__suppress_fo:
-            return
+            return [NullSink()]
 
-        self.__file_csv = open(MOLES_TAGS_FILE, 'w')
+        if not output_sinks:
+            return SinkFactory.default_sinks()
 
-        self.__file_drs = open(ESGF_DRS_FILE, 'w')
+        return [
+            SinkFactory.from_spec(sink) if isinstance(sink, str) else sink
+            for sink in output_sinks
+        ]
+
+    def _open_files(self, ):
+
+        for sink in self.__sinks:
+            sink.open()
 
     def _close_files(self, ):
-        if self.__suppress_fo:
-            return
 
-        self.__file_csv.close()
+        for sink in self.__sinks:
+            sink.close()
+
+        if self.__scanner is not None:
+            self.__scanner.close()
 
-        self.__file_drs.close()
+        if self.__attribute_store is not None:
+            self.__attribute_store.close()
 
 
 if __name__ == '__main__':
@@ -1,3 +1,8 @@
+import json
+
+import pytest
+
+
 def pytest_collection_modifyitems(items):
 
     CLASS_ORDER = [
@@ -17,4 +22,81 @@ def pytest_collection_modifyitems(items):
         ]
         
    
-    items[:] = sorted_items
\ No newline at end of file
+    items[:] = sorted_items
+
+
+SKOS = 'http://www.w3.org/2004/02/skos/core#'
+VOCAB = 'https://vocab.ceda.ac.uk'
+
+
+def concept(scheme, name, pref, alt=None, broader=None, narrower=None):
+    """Build a JSON-LD ontology record in the form served by the vocab server"""
+    record = {
+        '@id': f'{VOCAB}/collection/cci/{scheme}/{name}',
+        f'{SKOS}inScheme': [{'@id': f'{VOCAB}/scheme/cci/{scheme}'}],
+        f'{SKOS}prefLabel': [{'@value': pref}],
+    }
+    if alt:
+        record[f'{SKOS}altLabel'] = [{'@value': alt}]
+    if broader:
+        record[f'{SKOS}broader'] = [{'@id': f'{VOCAB}/collection/cci/{broader}'}]
+    if narrower:
+        record[f'{SKOS}narrower'] = [{'@id': f'{VOCAB}/collection/cci/{n}'} for n in narrower]
+    return record
+
+
+ONTOLOGY = [
+    {'@id': f'{VOCAB}/scheme/cci/procLev'},
+    concept('procLev', 'proc_level3', 'Level 3', alt='L3', narrower=['procLev/proc_level3c']),
+    concept('procLev', 'proc_level3c', 'Level 3C', alt='L3C', broader='procLev/proc_level3'),
+    concept('procLev', 'proc_level2', 'Level 2', alt='L2'),
+    concept('ecv', 'cloud', 'Cloud', alt='CLOUD'),
+    concept('project', 'cci', 'CCI'),
+    concept('dataType', 'cld_products', 'cloud products', alt='CLD_PRODUCTS'),
+    concept('product', 'avhrr_noaa', 'AVHRR_NOAA'),
+    concept('freq', 'month', 'month'),
+    concept('org', 'dwd', 'DWD'),
+    concept('sensor', 'avhrr', 'AVHRR', alt='AVHRR-3'),
+    concept('platformGrp', 'satellite', 'Satellite', narrower=['platformProg/noaa_poes']),
+    concept('platformProg', 'noaa_poes', 'NOAA POES', broader='platformGrp/satellite',
+            narrower=['platform/noaa-16', 'platform/noaa-18']),
+    concept('platform', 'noaa-16', 'NOAA-16', broader='platformProg/noaa_poes'),
+    concept('platform', 'noaa-18', 'NOAA-18', broader='platformProg/noaa_poes'),
+]
+
+
+@pytest.fixture(scope='session')
+def ontology():
+    return ONTOLOGY
+
+
+@pytest.fixture(scope='session')
+def ontology_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('ontology') / 'cci-ontology.json'
+    path.write_text(json.dumps(ONTOLOGY))
+    return str(path)
+
+
+@pytest.fixture
+def cci_dataset(tmp_path):
+    """A dataset of empty CCI named files and the JSON mapping which describes it"""
+    dataset = tmp_path / 'cloud' / 'L3C'
+    for year in ('2008', '2009'):
+        directory = dataset / year
+        directory.mkdir(parents=True)
+        for month in ('01', '02'):
+            (directory / f'{year}{month}-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-fv3.0.txt').touch()
+
+    mapping = tmp_path / 'cloud.json'
+    mapping.write_text(json.dumps({
+        'datasets': [str(dataset)],
+        'defaults': {
+            'platform': 'NOAA-16',
+            'sensor': 'AVHRR',
+            'time_coverage_resolution': 'month',
+            'product_version': '3.0',
+            'institution': 'DWD'
+        }
+    }))
+
+    return dataset, str(mapping)
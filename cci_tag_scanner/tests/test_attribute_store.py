@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils.attribute_store import AttributeStore
+
+
+class TestAttributeStore:
+    def test_round_trip(self, tmp_path):
+        with AttributeStore(str(tmp_path / 'attrs.db')) as store:
+            store.put('/ds', '/ds/a.nc', {'project': 'CLOUD'}, {'platform': np.str_('NOAA-16'), 'sensor': np.array(['AVHRR'])})
+            store.put('/ds', '/ds/b.nc', {'project': 'CLOUD'}, {})
+            store.put('/other', '/other/c.nc', {}, {})
+            store.commit()
+
+            assert store.get_files('/ds') == [
+                ('/ds/a.nc', {'project': 'CLOUD'}, {'platform': 'NOAA-16', 'sensor': ['AVHRR']}),
+                ('/ds/b.nc', {'project': 'CLOUD'}, {})
+            ]
+            assert store.datasets() == ['/ds', '/other']
+
+            assert store.has_dataset('/ds')
+            store.remove_dataset('/ds')
+            assert len(store) == 1
+            assert not store.has_dataset('/ds')
+
+    def test_retag_after_mapping_change(self, ontology_file, cci_dataset, tmp_path, monkeypatch):
+        dataset, mapping = cci_dataset
+        store_path = str(tmp_path / 'attrs.db')
+
+        def tag(retag=False):
+            pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                                  ontology_local=ontology_file, attribute_store=store_path)
+            ds = pds.get_dataset(str(dataset))
+            result = ds.retag_dataset() if retag else ds.process_dataset()
+            pds._close_files()
+            return result
+
+        scanned = tag()
+
+        # Retagging gives the same result without touching the files
+        def no_scan(*args, **kwargs):
+            raise AssertionError('File was read during retag')
+
+        monkeypatch.setattr('cci_tag_scanner.dataset.dataset.Dataset._scan_file', no_scan)
+        monkeypatch.setattr('cci_tag_scanner.dataset.dataset.Dataset._get_dataset_files', no_scan)
+        assert tag(retag=True) == scanned
+
+        # A mapping change is picked up
+        data = json.loads(open(mapping).read())
+        data['defaults']['platform'] = 'NOAA-18'
+        with open(mapping, 'w') as writer:
+            json.dump(data, writer)
+
+        _, file_map = tag(retag=True)
+        assert list(file_map) == ['esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-18.AVHRR_NOAA.3-0.r1']
+        assert sorted(file_map.popitem()[1]) == sorted(f.as_posix() for f in dataset.glob('*/*'))
+
+    def test_with_result_cache(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        cache_dir = str(tmp_path / 'cache')
+
+        def tag(store_path):
+            pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping], ontology_local=ontology_file,
+                                  result_cache=cache_dir, attribute_store=store_path)
+            result = pds.get_dataset(str(dataset)).process_dataset()
+            pds._close_files()
+            return result
+
+        # Fill the result cache without a store
+        scanned = tag(None)
+
+        # A new store still gets the files although the result is cached
+        store_path = str(tmp_path / 'attrs.db')
+        assert tag(store_path) == scanned
+
+        with AttributeStore(store_path) as store:
+            assert len(store.get_files(str(dataset))) == 4
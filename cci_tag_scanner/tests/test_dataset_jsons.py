@@ -0,0 +1,43 @@
+import json
+
+from cci_tag_scanner.utils.dataset_jsons import DatasetJSONMappings
+
+DATASETS = ['/neodc/esacci/cloud/data/L3C', '/neodc/esacci/cloud/data/L3C/avhrr', '/neodc/esacci/sst/file.nc']
+
+PATHS = [
+    '/neodc/esacci/cloud/data/L3C/2008/a.nc',
+    '/neodc/esacci/cloud/data/L3C/2008/b.nc',
+    '/neodc/esacci/cloud/data/L3C/avhrr',
+    '/neodc/esacci/cloud/data/L3C/avhrr/',
+    '/neodc/esacci/cloud/data/L3C/avhrr/a.nc',
+    '/neodc/esacci/cloud/data/L3C',
+    '/neodc/esacci/sst/file.nc',
+    '/neodc/esacci/sst/other.nc',
+    '/neodc/esacci/cloud/data/L2/a.nc',
+    'a.nc',
+]
+
+
+class TestDatasetJSONMappings:
+    def get_mappings(self, tmp_path, **kwargs):
+        mapping = tmp_path / 'mapping.json'
+        mapping.write_text(json.dumps({'datasets': DATASETS}))
+        return DatasetJSONMappings([str(mapping)], **kwargs)
+
+    def test_resolution_cache(self, tmp_path):
+        cached = self.get_mappings(tmp_path)
+        uncached = self.get_mappings(tmp_path, resolution_cache_size=0)
+
+        for path in PATHS * 2:
+            assert cached.get_dataset(path) == uncached.get_dataset(path)
+
+        assert cached.get_dataset('/neodc/esacci/cloud/data/L2/a.nc') == '/neodc/esacci/cloud/data/L2/a.nc'
+        assert cached.resolution_cache_info().hits > 0
+
+    def test_rebuild_clears_cache(self, tmp_path):
+        mappings = self.get_mappings(tmp_path)
+        mappings.get_dataset(PATHS[0])
+
+        mappings._build_tree([])
+        assert mappings.resolution_cache_info().currsize == 0
+        assert mappings.get_dataset(PATHS[0]) == PATHS[0]
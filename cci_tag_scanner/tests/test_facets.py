@@ -0,0 +1,186 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cci_tag_scanner.facets import Facets
+from cci_tag_scanner.utils.http_cache import HTTPCache
+from cci_tag_scanner.utils.json_stream import iter_json_array
+
+
+class OntologyHandler(BaseHTTPRequestHandler):
+    ETAG = '"v1"'
+    body = b''
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('If-None-Match'))
+
+        if self.headers.get('If-None-Match') == self.ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = self.body
+        self.send_response(200)
+        self.send_header('ETag', self.ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        return
+
+
+@pytest.fixture
+def vocab_server(ontology):
+    OntologyHandler.requests = []
+    OntologyHandler.body = json.dumps(ontology).encode()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OntologyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server, f'http://127.0.0.1:{server.server_port}/cci-ontology.json'
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestOntologyCache:
+    def test_facets_from_cache(self, vocab_server, tmp_path, ontology_file):
+        server, url = vocab_server
+
+        f1 = Facets(endpoint=url, cache_dir=str(tmp_path))
+        f2 = Facets(endpoint=url, cache_dir=str(tmp_path))
+
+        # The second instance is served from the cache without a request
+        assert OntologyHandler.requests == [None]
+        assert f1.to_json() == f2.to_json() == Facets(endpoint=ontology_file).to_json()
+
+    def test_conditional_request(self, vocab_server, tmp_path, ontology):
+        server, url = vocab_server
+        cache = HTTPCache(url, cache_dir=str(tmp_path), revalidate_after=0)
+
+        first = cache.fetch()
+        second = cache.fetch()
+
+        assert first == second
+        assert OntologyHandler.requests == [None, OntologyHandler.ETAG]
+        assert json.load(open(second)) == ontology
+
+    def test_offline(self, vocab_server, tmp_path, ontology):
+        server, url = vocab_server
+        HTTPCache(url, cache_dir=str(tmp_path)).fetch()
+        server.shutdown()
+        server.server_close()
+
+        path = HTTPCache(url, cache_dir=str(tmp_path), revalidate_after=0, timeout=1).fetch()
+        assert json.load(open(path)) == ontology
+
+        with pytest.raises(ValueError):
+            HTTPCache(url, cache_dir=str(tmp_path), revalidate_after=0, max_stale=0, timeout=1).fetch()
+
+
+class TestStreamingDecode:
+    def test_iter_json_array(self):
+        data = [{'a': [1, {'b': 'x]y'}]}, 4.5e3, 'c,d', None, [], -1]
+        text = json.dumps(data, indent=2)
+
+        for size in (1, 3, 64):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            assert list(iter_json_array(chunks)) == data
+
+    def test_not_an_array(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array(['{"a": 1}']))
+
+    def test_uncached_stream(self, vocab_server, ontology_file):
+        server, url = vocab_server
+
+        assert Facets(endpoint=url, use_cache=False).to_json() == Facets(endpoint=ontology_file).to_json()
+
+
+class TestFacets:
+    def test_labels(self, ontology_file):
+        facets = Facets(endpoint=ontology_file)
+
+        assert facets.get_labels('platform')['noaa-16'].uri.endswith('/platform/noaa-16')
+        assert facets.get_alt_labels('processing_level')['l3c'].tag == 'L3C'
+        assert facets.reversed_facets['sensor'][facets.get_labels('sensor')['avhrr'].uri] == 'AVHRR'
+
+    def test_json_round_trip(self, ontology_file, tmp_path):
+        facets = Facets(endpoint=ontology_file)
+        facets.to_json(str(tmp_path / 'facets.json'))
+
+        loaded = Facets.from_json(str(tmp_path / 'facets.json'))
+        assert loaded.to_json() == facets.to_json()
+
+    def test_label_tables(self, ontology_file):
+        facets = Facets(endpoint=ontology_file)
+        uris = {uri for reversed in facets.reversed_facets.values() for uri in reversed}
+        uris.add('https://vocab.ceda.ac.uk/collection/cci/unknown')
+
+        for facet, source in Facets.LABEL_SOURCE.items():
+            for uri in uris:
+                expected = getattr(facets, source)(facet, uri) if source else uri
+                assert facets.get_label_from_uri(facet, uri) == expected
+
+    def test_process_bags(self, ontology_file):
+        facets = Facets(endpoint=ontology_file)
+        platform = facets.get_labels('platform')['noaa-16'].uri
+        programme = facets.get_labels('platform_programme')['noaa poes'].uri
+
+        bags = [
+            {'platform': [platform, programme], 'product_version': '3.0'},
+            {'sensor': ['https://vocab.ceda.ac.uk/collection/cci/unknown']},
+        ]
+
+        assert facets.process_bags(bags) == [
+            {'platform': ['NOAA-16', 'NOAA POES'], 'product_version': ['3.0']},
+            {'sensor': []},
+        ]
+
+    def test_platform_hierarchy(self, ontology_file):
+        facets = Facets(endpoint=ontology_file)
+
+        def term_uri(facet, term):
+            term_l = term.lower()
+            if term_l in facets.get_labels(facet):
+                return facets.get_labels(facet)[term_l].uri
+            if term_l in facets.get_alt_labels(facet):
+                return facets.get_alt_labels(facet)[term_l].uri
+
+        def programme_group(uri):
+            tags = []
+            programme = facets.get_platforms_programme(uri)
+            if programme:
+                tags.append(term_uri('platform_programme', programme))
+                group = facets.get_programmes_group(tags[0])
+                if group:
+                    tags.append(term_uri('platform_group', group))
+            return tuple(tags)
+
+        def platform_as_programme(platform):
+            if platform in facets.get_programme_labels():
+                tags = [term_uri('platform_programme', platform)]
+                group = facets.get_programmes_group(tags[0])
+                if group:
+                    tags.append(term_uri('platform_group', group))
+                return tuple(tags)
+            if platform in facets.get_group_labels():
+                return (term_uri('platform_group', platform),)
+            return ()
+
+        uris = facets.reversed_facets['platform']
+        labels = ['NOAA POES', 'Satellite', 'NOAA-18', 'noaa poes']
+
+        for uri in uris:
+            assert facets.get_platform_hierarchy(uri) == programme_group(uri)
+        for label in labels:
+            assert facets.get_platform_label_hierarchy(label) == platform_as_programme(label)
+
+        assert facets.get_platform_hierarchy(facets.get_labels('platform')['noaa-18'].uri) == (
+            facets.get_labels('platform_programme')['noaa poes'].uri,
+            facets.get_labels('platform_group')['satellite'].uri
+        )
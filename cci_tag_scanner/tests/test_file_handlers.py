@@ -0,0 +1,261 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from cci_tag_scanner.dataset import Dataset
+from cci_tag_scanner.file_handlers.handler_factory import HandlerFactory
+from cci_tag_scanner.file_handlers.isolation import IsolatedScanner, ScanError, ScanTimeout
+from cci_tag_scanner.file_handlers.kerchunk import KerchunkHandler, ReferenceMetadata
+from cci_tag_scanner.file_handlers.zarr import ZARR_MARKERS, ZarrHandler
+from cci_tag_scanner.tagger import ProcessDatasets
+
+ATTRS = {
+    'time_coverage_resolution': 'P1M',
+    'platform': 'NOAA-16',
+    'sensor': 'AVHRR',
+    'institution': 'DWD',
+    'product_version': 3.0
+}
+
+EXPECTED = {
+    'time_coverage_resolution': 'P1M',
+    'platform': 'NOAA-16',
+    'sensor': 'AVHRR',
+    'institution': 'DWD',
+    'product_version': '3.0'
+}
+
+
+def make_store(path, consolidated=True):
+    path.mkdir()
+    (path / '.zgroup').write_text(json.dumps({'zarr_format': 2}))
+    if consolidated:
+        metadata = {'.zgroup': {'zarr_format': 2}, '.zattrs': ATTRS}
+        (path / '.zmetadata').write_text(json.dumps({'metadata': metadata, 'zarr_consolidated_format': 1}))
+    else:
+        (path / '.zattrs').write_text(json.dumps(ATTRS))
+
+    # Chunk files should never be listed or read
+    (path / 'cloud').mkdir()
+    for i in range(3):
+        (path / 'cloud' / f'0.{i}').write_bytes(b'\x00')
+    return path
+
+
+class TestZarrHandlers:
+    def test_zarr_handler(self, tmp_path):
+        consolidated = make_store(tmp_path / 'consolidated.zarr')
+        plain = make_store(tmp_path / 'plain.zarr', consolidated=False)
+
+        assert ZarrHandler(consolidated).extract_facet_labels('L3C') == EXPECTED
+        assert ZarrHandler(plain).extract_facet_labels('L3C') == EXPECTED
+        assert ZarrHandler(tmp_path / 'missing.zarr').extract_facet_labels('L3C') == {}
+        assert HandlerFactory.get_handler('.zarr') is ZarrHandler
+
+    def test_kerchunk_handler(self, tmp_path):
+        v1 = tmp_path / 'v1.json'
+        v1.write_text(json.dumps({'version': 1, 'refs': {'.zattrs': json.dumps(ATTRS)}}))
+        v0 = tmp_path / 'v0.json'
+        v0.write_text(json.dumps({'.zattrs': ATTRS, 'cloud/0.0': ['s3://bucket/file.nc', 0, 10]}))
+        other = tmp_path / 'other.json'
+        other.write_text(json.dumps({'not': 'a reference'}))
+
+        assert KerchunkHandler(v1).extract_facet_labels('L3C') == EXPECTED
+        assert KerchunkHandler(v0).extract_facet_labels('L3C') == EXPECTED
+        assert KerchunkHandler(other).extract_facet_labels('L3C') == {}
+
+    def test_stores_are_one_unit(self, tmp_path, monkeypatch):
+        make_store(tmp_path / 'a.zarr')
+        make_store(tmp_path / 'unsuffixed')
+        (tmp_path / 'sub').mkdir()
+        (tmp_path / 'sub' / 'file.nc').write_bytes(b'')
+
+        # Stores are found from the directory listings, not by checking for markers
+        checked = []
+        is_file = Path.is_file
+        monkeypatch.setattr(Path, 'is_file', lambda self: checked.append(self.name) or is_file(self))
+
+        files = sorted(p.relative_to(tmp_path).as_posix() for p in Dataset._walk_dataset(tmp_path))
+
+        assert files == ['a.zarr', 'sub/file.nc', 'unsuffixed']
+        assert not set(checked) & set(ZARR_MARKERS)
+
+
+class TestReferenceMetadata:
+    def test_process_dataset_from_reference(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+        members = {
+            f.relative_to(dataset).as_posix(): {'platform': 'NOAA-18'}
+            for f in dataset.glob('2009/*')
+        }
+        reference = dataset.parent / 'reference.json'
+        reference.write_text(json.dumps({'files': members}))
+
+        data = json.loads(open(mapping).read())
+        data['references'] = {str(dataset): reference.relative_to(Path(mapping).parent).as_posix()}
+        with open(mapping, 'w') as writer:
+            json.dump(data, writer)
+
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping], ontology_local=ontology_file)
+        ds = pds.get_dataset(str(dataset))
+
+        assert len(ReferenceMetadata.from_file(reference, root=dataset)) == 2
+
+        _, file_map = ds.process_dataset()
+
+        assert {drs: len(files) for drs, files in file_map.items()} == {
+            'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1': 2,
+            'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-18.AVHRR_NOAA.3-0.r1': 2
+        }
+
+    @pytest.mark.parametrize('content', [[1, 2], 'files', {'files': {'2008/a.nc': ['NOAA-18']}}])
+    def test_bad_reference(self, ontology_file, cci_dataset, content):
+        dataset, mapping = cci_dataset
+        reference = dataset.parent / 'reference.json'
+        reference.write_text(json.dumps(content))
+
+        with pytest.raises(ValueError):
+            ReferenceMetadata.from_file(reference, root=dataset)
+
+        # Falls back to scanning the files
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping], ontology_local=ontology_file)
+        _, file_map = pds.get_dataset(str(dataset)).process_dataset(reference=str(reference))
+
+        assert sum(len(files) for files in file_map.values()) == 4
+
+
+class TestHandlerFactory:
+    def test_sniff_mislabelled_files(self, tmp_path):
+        import netCDF4
+        from cci_tag_scanner.file_handlers.netcdf import NetcdfHandler
+
+        mislabelled = tmp_path / 'ESACCI-CLOUD-L3C-CLD_PRODUCTS-AVHRR_NOAA-200801-fv3.0.dat'
+        with netCDF4.Dataset(mislabelled, 'w', format='NETCDF4') as ds:
+            ds.setncatts(ATTRS)
+
+        reference = tmp_path / 'reference'
+        reference.write_text(json.dumps({'version': 1, 'refs': {'.zattrs': json.dumps(ATTRS)}}))
+
+        handler, header = HandlerFactory.get_handler_for_path(mislabelled)
+        assert handler is NetcdfHandler
+        assert handler(mislabelled, header=header).extract_facet_labels('L3C') == EXPECTED
+
+        handler, header = HandlerFactory.get_handler_for_path(reference)
+        assert handler is KerchunkHandler
+        assert handler(reference, header=header).extract_facet_labels('L3C') == EXPECTED
+
+        store = make_store(tmp_path / 'store')
+        assert HandlerFactory.get_handler_for_path(store) == (ZarrHandler, None)
+
+        unknown = tmp_path / 'notes.txt'
+        unknown.write_text('not data')
+        assert HandlerFactory.get_handler_for_path(unknown)[0] is None
+
+    def test_registered_extension_not_read(self, tmp_path, monkeypatch):
+        from cci_tag_scanner.file_handlers import base
+        from cci_tag_scanner.file_handlers.netcdf import NetcdfHandler
+
+        reads = []
+        monkeypatch.setattr(HandlerFactory, 'read_header', staticmethod(lambda filepath: reads.append(filepath)))
+
+        fpath = tmp_path / 'ESACCI-CLOUD-L3C-CLD_PRODUCTS-AVHRR_NOAA-200801-fv3.0.nc'
+        assert HandlerFactory.get_handler_for_path(fpath) == (NetcdfHandler, None)
+        assert reads == []
+
+        # A header given by the caller is still sniffed
+        reference = json.dumps({'refs': {}}).encode()
+        assert HandlerFactory.get_handler_for_path(fpath, header=reference) == (KerchunkHandler, reference)
+
+        monkeypatch.setattr(base.os.path, 'getsize', lambda filepath: pytest.fail('stat of a short header'))
+        assert base.FileHandler.whole_file(fpath, reference)
+
+    def test_handlers_resolved_once(self, monkeypatch):
+        from cci_tag_scanner.file_handlers import handler_factory
+
+        calls = []
+
+        def locate(path):
+            calls.append(path)
+            return ZarrHandler
+
+        class EntryPoint:
+            name = '.grib'
+            value = 'grib_handler:GribHandler'
+
+            def load(self):
+                return KerchunkHandler
+
+        monkeypatch.setattr(handler_factory, 'locate', locate)
+        monkeypatch.setattr(handler_factory, 'entry_points', lambda: {handler_factory.ENTRY_POINT_GROUP: [EntryPoint()]})
+        monkeypatch.setattr(HandlerFactory, 'HANDLER_MAP', dict(HandlerFactory.HANDLER_MAP))
+        monkeypatch.setattr(HandlerFactory, '_handlers', {})
+        monkeypatch.setattr(HandlerFactory, '_entry_points_loaded', False)
+
+        for _ in range(3):
+            assert HandlerFactory.get_handler('.zarr') is ZarrHandler
+
+        assert calls == ['cci_tag_scanner.file_handlers.zarr.ZarrHandler']
+        assert HandlerFactory.get_handler('.grib') is KerchunkHandler
+        assert HandlerFactory.get_handler('.txt') is None
+
+
+def scan_or_fail(filepath, proc_level):
+    """Scan function for the worker which hangs or crashes on request"""
+    if 'hang' in filepath.name:
+        time.sleep(60)
+    if 'crash' in filepath.name:
+        os._exit(11)
+    if '200902' in filepath.name:
+        return {'platform': 'NOAA-18'}
+    return {}
+
+
+class TestIsolatedScanner:
+    def test_timeout_and_crash(self, tmp_path):
+        with IsolatedScanner(timeout=2, max_tasks=2, scan_func=scan_or_fail) as scanner:
+            assert scanner.scan(tmp_path / 'ok', 'L3C') == {}
+
+            with pytest.raises(ScanTimeout):
+                scanner.scan(tmp_path / 'hang', 'L3C')
+
+            with pytest.raises(ScanError, match='exit code 11'):
+                scanner.scan(tmp_path / 'crash', 'L3C')
+
+            # Recycled after max_tasks
+            pids = set()
+            for _ in range(3):
+                scanner.scan(tmp_path / 'ok', 'L3C')
+                pids.add(scanner._process.pid)
+            assert len(pids) == 2
+
+    def test_failed_files_are_deferred(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+        hung = dataset / '2009' / '200901-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-hang-fv3.0.txt'
+        hung.touch()
+
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping], ontology_local=ontology_file)
+        ds = pds.get_dataset(str(dataset))
+
+        order = []
+        scanner = IsolatedScanner(timeout=1, scan_func=scan_or_fail)
+        original = scanner.scan
+
+        def scan(filepath, proc_level):
+            order.append(filepath.name)
+            return original(filepath, proc_level)
+
+        scanner.scan = scan
+        ds.scanner = scanner
+
+        with scanner:
+            _, file_map = ds.process_dataset()
+
+        assert order.count(hung.name) == 2 and order[-1] == hung.name
+        assert ds.failed_files == [hung.as_posix()]
+        assert {drs: len(files) for drs, files in file_map.items()} == {
+            'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1': 4,
+            'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-18.AVHRR_NOAA.3-0.r1': 1
+        }
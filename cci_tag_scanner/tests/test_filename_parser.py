@@ -0,0 +1,46 @@
+from cci_tag_scanner.dataset import Dataset
+from cci_tag_scanner.dataset.filename_parser import parse_file_names
+
+NAMES = [
+    '20100101-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-16-fv3.0.nc',
+    '20100101120000-ESACCI-L4_GHRSST-SSTdepth-OSTIA-GLOB_LT-v02.0-fv01.0.nc',
+    'ESACCI-SEASURFACESALINITY-L4-SSS-MERGED_OI_Monthly_CENTRED_15Day_25km-20130101-fv1.8.nc',
+    'ESACCI-OC-L3S-CHLOR_A-MERGED-1M_MONTHLY_4km_GEO_PML_OCx-201001-fv4.2.nc',
+    'ESACCI-LC-L4-LCCS-Map-300m-P1Y-1992-v2.0.7cds.nc',
+    'ESACCI-SOILMOISTURE-L3S-SSMV-fv04.nc',
+    'readme.txt',
+    'a-b-c-d',
+]
+
+
+def parse_one(name):
+    """The per-file logic of Dataset._parse_file_name"""
+    segments = name.split('-')
+    if len(segments) < 5:
+        return {}
+    if segments[1] == Dataset.ESACCI:
+        return Dataset._get_data_from_filename1(segments)
+    if segments[0] == Dataset.ESACCI:
+        return Dataset._get_data_from_filename2(segments)
+    return {}
+
+
+class TestFilenameParser:
+    def test_matches_per_file_parser(self):
+        columns = parse_file_names(NAMES)
+
+        assert len(columns) == len(NAMES)
+        for i, name in enumerate(NAMES):
+            assert columns.get_tags(i) == parse_one(name)
+
+    def test_indicative_date(self):
+        columns = parse_file_names(NAMES)
+
+        assert list(columns.indicative_date[:6]) == [
+            '20100101', '20100101120000', '20130101', '201001', '1992', ''
+        ]
+        assert list(columns.valid) == [True] * 6 + [False, False]
+
+    def test_empty(self):
+        columns = parse_file_names([])
+        assert len(columns) == 0
@@ -0,0 +1,56 @@
+import os
+
+from cci_tag_scanner.dataset import dataset as dataset_module
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils.locality import batch_by_directory, order_by_locality
+
+
+class TestLocality:
+    def test_order_by_locality(self, tmp_path):
+        files = []
+        for name in ('c', 'a', 'b'):
+            for directory in ('x', 'y'):
+                path = tmp_path / directory / name
+                path.parent.mkdir(exist_ok=True)
+                path.touch()
+                files.append(path)
+
+        # Interleaved directories
+        assert [f.parent.name for f in files] == ['x', 'y'] * 3
+        assert order_by_locality(files, 'walk') == files
+
+        by_name = order_by_locality(files, 'directory')
+        assert [f'{f.parent.name}/{f.name}' for f in by_name] == ['x/a', 'x/b', 'x/c', 'y/a', 'y/b', 'y/c']
+
+        by_inode = order_by_locality(map(str, files), 'inode')
+        assert [f.parent.name for f in by_inode] == ['x'] * 3 + ['y'] * 3
+        assert [os.stat(f).st_ino for f in by_inode[:3]] == sorted(os.stat(f).st_ino for f in by_inode[:3])
+
+        # Pluggable key
+        by_name_only = order_by_locality(files, lambda files: lambda path: path.name)
+        assert [f.name for f in by_name_only] == ['a', 'a', 'b', 'b', 'c', 'c']
+
+        batches = [(d.name, len(batch)) for d, batch in batch_by_directory(by_inode)]
+        assert batches == [('x', 3), ('y', 3)]
+
+    def test_process_dataset_parses_per_directory(self, ontology_file, cci_dataset, monkeypatch):
+        dataset, mapping = cci_dataset
+        parse_file_names = dataset_module.parse_file_names
+        batches = []
+
+        def record(names):
+            batches.append(len(names))
+            return parse_file_names(names)
+
+        monkeypatch.setattr(dataset_module, 'parse_file_names', record)
+
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, scan_order='directory')
+        ds = pds.get_dataset(str(dataset))
+        _, file_map = ds.process_dataset()
+
+        assert batches == [2, 2]
+        assert {drs: sorted(files) for drs, files in file_map.items()} == {
+            'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1':
+                sorted(f.as_posix() for f in dataset.glob('*/*'))
+        }
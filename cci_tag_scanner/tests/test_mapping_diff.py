@@ -0,0 +1,46 @@
+import copy
+import json
+
+from cci_tag_scanner.scripts.mapping_diff import compare_mappings, load_mappings
+
+MAPPING = {
+    'datasets': ['/neodc/esacci/cloud/L3C', '/neodc/esacci/cloud/L3U/'],
+    'defaults': {'platform': 'NOAA-16'},
+    'realisations': {'/neodc/esacci/cloud/L3C': 'r1'},
+    'filters': {'/neodc/esacci/cloud/L3U/': [{'pattern': '.*', 'realisation': 'r2'}]}
+}
+OTHER = {'datasets': ['/neodc/esacci/ozone/L3'], 'defaults': {'platform': 'Envisat'}}
+
+
+def write_tree(root, files):
+    root.mkdir()
+    for name, data in files.items():
+        (root / name).write_text(json.dumps(data))
+    return str(root)
+
+
+class TestMappingDiff:
+    def test_changed_datasets(self, tmp_path):
+        old = load_mappings(write_tree(tmp_path / 'old', {'cloud.json': MAPPING, 'ozone.json': OTHER}))
+
+        # Dataset specific sections only affect that dataset
+        new_mapping = copy.deepcopy(MAPPING)
+        new_mapping['realisations']['/neodc/esacci/cloud/L3C'] = 'r2'
+        new = load_mappings(write_tree(tmp_path / 'new1', {'cloud.json': new_mapping, 'ozone.json': OTHER}))
+        assert compare_mappings(old, new) == {'/neodc/esacci/cloud/L3C': ['realisations']}
+
+        # File sections affect every dataset in the file. Moving a dataset
+        # to another file without changing it is not a change
+        new_mapping = copy.deepcopy(MAPPING)
+        new_mapping['defaults']['sensor'] = 'AVHRR'
+        new_mapping['datasets'].append('/neodc/esacci/cloud/L2')
+        files = {'cloud.json': new_mapping, 'sub_ozone.json': OTHER}
+        new = load_mappings(write_tree(tmp_path / 'new2', files))
+        assert compare_mappings(old, new) == {
+            '/neodc/esacci/cloud/L2': ['added'],
+            '/neodc/esacci/cloud/L3C': ['defaults'],
+            '/neodc/esacci/cloud/L3U': ['defaults'],
+        }
+
+        new = load_mappings(write_tree(tmp_path / 'new3', {'cloud.json': MAPPING}))
+        assert compare_mappings(old, new) == {'/neodc/esacci/ozone/L3': ['removed']}
@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+
+from cci_tag_scanner.output.base import NullSink
+from cci_tag_scanner.output.sink_factory import SinkFactory
+
+DRS = {
+    'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1': ['/a/1.nc', '/a/2.nc'],
+    'UNKNOWN_DRS - /a': ['/a/readme.txt']
+}
+
+
+class TestOutputSinks:
+    def test_json_matches_single_dump(self, tmp_path):
+        path = tmp_path / 'esgf_drs.json'
+        with SinkFactory.from_spec(f'json:{path}') as sink:
+            sink.write_drs(sorted(DRS.items()))
+
+        expected = json.dumps(DRS, sort_keys=True, indent=4, separators=(',', ': '))
+        assert path.read_text() == expected
+
+    def test_json_empty(self, tmp_path):
+        path = tmp_path / 'esgf_drs.json'
+        with SinkFactory.from_spec(f'json:{path}') as sink:
+            sink.write_drs([])
+
+        assert json.loads(path.read_text()) == {}
+
+    def test_csv_gzip(self, tmp_path):
+        path = tmp_path / 'moles_tags.csv.gz'
+        with SinkFactory.from_spec(f'csv:{path}') as sink:
+            sink.write_moles_tags('/a', ['uri1', 'uri2'])
+
+        with gzip.open(path, 'rt') as reader:
+            assert reader.read() == '/a,uri1\n/a,uri2\n'
+
+    def test_jsonl(self, tmp_path):
+        path = tmp_path / 'esgf_drs.jsonl'
+        with SinkFactory.from_spec(f'jsonl:{path}') as sink:
+            sink.write_moles_tags('/a', ['uri1'])
+            sink.write_drs(DRS.items())
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert records[0] == {'dataset': '/a', 'uris': ['uri1']}
+        assert {r['drs']: r['files'] for r in records[1:]} == DRS
+
+    def test_null(self):
+        assert isinstance(SinkFactory.from_spec('null'), NullSink)
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            SinkFactory.from_spec('xml')
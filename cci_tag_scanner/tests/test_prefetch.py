@@ -0,0 +1,74 @@
+import time
+
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils import prefetch
+from cci_tag_scanner.utils.prefetch import HeaderPrefetcher
+
+
+class TestHeaderPrefetcher:
+    def test_headers_in_order(self, tmp_path):
+        files = []
+        for i in range(20):
+            path = tmp_path / f'{i:02d}'
+            path.write_bytes(bytes([i]) * (i * 100))
+            files.append(path)
+        (tmp_path / 'store').mkdir()
+        files.append(tmp_path / 'store')
+
+        prefetcher = HeaderPrefetcher(files, depth=3, buffer_size=1024, min_buffer=512,
+                                      skip=lambda f: f.name == '05')
+        result = list(prefetcher)
+
+        assert [f for f, _ in result] == files
+        assert result[5][1] is None
+        assert result[-1][1] is None
+        assert 512 <= len(result[19][1]) <= 1024
+        assert files[19].read_bytes().startswith(result[19][1])
+        assert all(header == f.read_bytes() for f, header in result[:5])
+
+    def test_adapts_to_latency(self, tmp_path, monkeypatch):
+        files = [tmp_path / str(i) for i in range(30)]
+        for path in files:
+            path.write_bytes(b'x')
+
+        read_header = prefetch.read_header
+
+        def slow_read(filepath, size):
+            time.sleep(0.02)
+            return read_header(filepath, size)[0], 0.02
+
+        monkeypatch.setattr(prefetch, 'read_header', slow_read)
+
+        prefetcher = HeaderPrefetcher(files, depth=1, buffer_size=1024, workers=8, max_buffer=4096)
+        assert len(list(prefetcher)) == 30
+        assert prefetcher.stalls > 0
+        assert prefetcher.depth > 1
+        assert prefetcher.buffer_size == 4096
+
+    def test_process_dataset(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+
+        results = []
+        for depth in (0, 2):
+            pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                                  ontology_local=ontology_file, prefetch=depth)
+            results.append(pds.get_dataset(str(dataset)).process_dataset())
+
+        assert results[0] == results[1]
+
+    def test_no_prefetch_with_scanner(self, ontology_file, cci_dataset, monkeypatch):
+        dataset, mapping = cci_dataset
+
+        def no_prefetch(*args, **kwargs):
+            raise AssertionError('Headers prefetched for the scan worker')
+
+        monkeypatch.setattr('cci_tag_scanner.dataset.dataset.HeaderPrefetcher', no_prefetch)
+
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, prefetch=2, scan_timeout=30)
+        try:
+            _, file_map = pds.get_dataset(str(dataset)).process_dataset()
+        finally:
+            pds.close()
+
+        assert sum(len(files) for files in file_map.values()) == 4
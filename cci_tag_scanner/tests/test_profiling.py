@@ -0,0 +1,78 @@
+import json
+import time
+
+import pytest
+
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils import prefetch
+from cci_tag_scanner.utils.profiling import RunProfiler
+
+
+class TestRunProfiler:
+    def test_slowest(self):
+        profiler = RunProfiler(top=2)
+        profiler.record('/ds/a', '/ds/a/1.nc', wall=1.0, cpu=0.2)
+        profiler.record('/ds/a', '/ds/a/2.nc', wall=0.005, cpu=0.005)
+        profiler.record('/ds/b', '/ds/b/1.nc', wall=5.0, cpu=0.1)
+        profiler.record('/ds/c', '/ds/c/1.nc', wall=0.5, cpu=0.5)
+
+        assert [entry['file'] for entry in profiler.slowest_files()] == ['/ds/b/1.nc', '/ds/a/1.nc']
+        assert profiler.slowest_files()[0]['io'] == pytest.approx(4.9)
+        assert [entry['dataset'] for entry in profiler.slowest_datasets()] == ['/ds/b', '/ds/a']
+        assert profiler.slowest_datasets()[1]['files'] == 2
+
+        histogram = profiler.report()['histogram']
+        assert histogram['wall'] == {'<=0.001s': 0, '<=0.01s': 1, '<=0.1s': 0, '<=1s': 2,
+                                     '<=10s': 1, '<=60s': 0, '>60s': 0}
+        assert histogram['io']['<=0.001s'] == 2
+
+    def test_time_file_records_failures(self):
+        profiler = RunProfiler()
+
+        with pytest.raises(OSError):
+            with profiler.time_file('/ds', '/ds/bad.nc'):
+                raise OSError
+
+        assert profiler.slowest_files()[0]['file'] == '/ds/bad.nc'
+
+
+class TestProcessDatasetsProfile:
+    def test_profile(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        profiler = RunProfiler(top=3, functions=True)
+
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, profiler=profiler)
+        profiler.run(pds.process_datasets, [str(dataset)])
+
+        written = profiler.write(str(tmp_path / 'profile'))
+        assert [path.rsplit('/', 1)[1] for path in written] == ['profile.pstats', 'profile.txt', 'latency.json']
+
+        report = json.loads((tmp_path / 'profile' / 'latency.json').read_text())
+        assert report['files'] == 4
+        assert len(report['slowest_files']) == 3
+        assert report['slowest_datasets'][0]['dataset'] == str(dataset)
+        assert 'process_datasets' in (tmp_path / 'profile' / 'profile.txt').read_text()
+        assert 'SLOWEST 3 FILES' in profiler.format_report()
+
+    def test_prefetch_wait_is_timed(self, ontology_file, cci_dataset, tmp_path, monkeypatch):
+        dataset, mapping = cci_dataset
+        read_header = prefetch.read_header
+
+        def slow_read(filepath, size):
+            time.sleep(0.1)
+            return read_header(filepath, size)
+
+        monkeypatch.setattr(prefetch, 'read_header', slow_read)
+
+        profiler = RunProfiler()
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, prefetch=1, profiler=profiler)
+        profiler.run(pds.process_datasets, [str(dataset)])
+
+        # The first header at least is waited for inside the file's timer
+        assert profiler.slowest_datasets()[0]['wall'] >= 0.1
+
+        # No cProfile without functions
+        written = profiler.write(str(tmp_path / 'profile'))
+        assert [path.rsplit('/', 1)[1] for path in written] == ['latency.json']
@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils.result_cache import ResultCache
+
+
+def process(ontology_file, mapping, dataset, cache_dir):
+    pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                          ontology_local=ontology_file, result_cache=str(cache_dir))
+    result = pds.get_dataset(str(dataset)).process_dataset()
+    return result, pds.result_cache_info()
+
+
+class TestResultCache:
+    def test_reuse_and_invalidation(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        cache_dir = tmp_path / 'cache'
+
+        first, info = process(ontology_file, mapping, dataset, cache_dir)
+        assert (info.hits, info.misses, info.currsize) == (0, 1, 1)
+
+        second, info = process(ontology_file, mapping, dataset, cache_dir)
+        assert (info.hits, info.misses) == (1, 0)
+        assert second == first
+
+        # A changed file invalidates the entry
+        changed = next(dataset.glob('2008/*'))
+        mtime = changed.stat().st_mtime + 10
+        os.utime(changed, (mtime, mtime))
+        _, info = process(ontology_file, mapping, dataset, cache_dir)
+        assert (info.hits, info.misses) == (0, 1)
+
+        # So does a changed mapping
+        data = json.loads(open(mapping).read())
+        data['defaults']['platform'] = 'NOAA-18'
+        with open(mapping, 'w') as writer:
+            json.dump(data, writer)
+        third, info = process(ontology_file, mapping, dataset, cache_dir)
+        assert (info.hits, info.misses) == (0, 1)
+        assert list(third[1]) == ['esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-18.AVHRR_NOAA.3-0.r1']
+
+        # And a different ontology
+        cache = ResultCache(cache_dir, ontology_fingerprint='other')
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, result_cache=cache)
+        pds.get_dataset(str(dataset)).process_dataset()
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_evict(self, tmp_path):
+        cache = ResultCache(tmp_path)
+        for i in range(3):
+            cache.put(f'/dataset/{i}', 'fp', {'platform': {'uri'}}, {'drs': ['file']}, set())
+
+        entries = cache.entries()
+        assert sorted(entry.dataset for entry in entries) == ['/dataset/0', '/dataset/1', '/dataset/2']
+        assert cache.get('/dataset/0', 'fp') == ({'platform': {'uri'}}, {'drs': ['file']}, set())
+        assert cache.get('/dataset/0', 'changed') is None
+
+        now = time.time()
+        for dataset, age in (('/dataset/0', 10), ('/dataset/1', 3600), ('/dataset/2', 20)):
+            os.utime(cache._path(dataset), (now - age, now - age))
+
+        assert [entry.dataset for entry in cache.evict(older_than=60)] == ['/dataset/1']
+        # Least recently used first
+        assert [entry.dataset for entry in cache.evict(max_bytes=max(entry.size for entry in entries))] == ['/dataset/2']
+        assert len(cache.clear()) == 1
+        assert cache.info().currsize == 0
@@ -0,0 +1,110 @@
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cci_tag_scanner.service import TaggingService, make_server
+from cci_tag_scanner.tagger import ProcessDatasets
+
+DRS = 'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1'
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def request(connection, method, path, body=None):
+    connection.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.fixture
+def service(ontology_file, cci_dataset):
+    dataset, mapping = cci_dataset
+    pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping], ontology_local=ontology_file)
+    service = TaggingService(pds, batch_window=0.2)
+    yield service
+    service.close()
+
+
+class TestTaggingService:
+    def test_batches_concurrent_requests(self, service, cci_dataset):
+        dataset, _ = cci_dataset
+        fpaths = sorted(str(f) for f in dataset.glob('*/*'))
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda f: service.tag([f]), reversed(fpaths)))
+
+        assert [tagged[0].drs for tagged in results] == [DRS] * 4
+        assert service.stats.batches < 4
+        assert service.stats.files == 4
+
+    def test_bad_request_only_fails_itself(self, service, cci_dataset, monkeypatch):
+        dataset, _ = cci_dataset
+        fpath = str(next(dataset.glob('2008/*')))
+        get_files_tags = service.tagger.get_files_tags
+
+        def failing(fpaths, **kwargs):
+            if 'bad' in fpaths:
+                raise OSError('bad file')
+            return get_files_tags(fpaths, **kwargs)
+
+        monkeypatch.setattr(service.tagger, 'get_files_tags', failing)
+
+        good, bad = service.submit([fpath]), service.submit(['bad'])
+        assert good.result()[0].drs == DRS
+        with pytest.raises(OSError):
+            bad.result()
+
+
+class TestHTTP:
+    def test_http(self, service, cci_dataset):
+        dataset, _ = cci_dataset
+        fpath = str(next(dataset.glob('2008/*')))
+
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+
+            assert request(connection, 'GET', '/health')[1]['status'] == 'ok'
+
+            status, body = request(connection, 'POST', '/tag', {'files': [fpath]})
+            assert status == 200
+            result = body['results'][0]
+            assert result['file'] == fpath
+            assert result['drs'] == DRS
+            assert result['labels']['platform_group'] == ['Satellite']
+
+            assert request(connection, 'POST', '/tag', {'files': fpath})[0] == 400
+            assert request(connection, 'GET', '/unknown')[0] == 404
+
+            metrics = request(connection, 'GET', '/metrics')[1]
+            assert metrics['requests'] == 1
+            assert metrics['latency']['max'] > 0
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_unix_socket(self, service, tmp_path):
+        socket_path = str(tmp_path / 'tagger.sock')
+        server = make_server(service, socket_path=socket_path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            status, body = request(UnixHTTPConnection(socket_path), 'GET', '/health')
+            assert status == 200
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,65 @@
+import json
+import os
+
+from cci_tag_scanner.output.json_sink import JSONSink
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils.spill import SpillingMapping
+
+
+class TestSpillingMapping:
+    def test_matches_dict(self, tmp_path):
+        updates = [
+            {'b': ['b1', 'b2'], 'a': ['a1']},
+            {'c': ['c1'], 'b': ['b3']},
+            {'a': ['a2', 'a3']},
+            {'d': ['d1']},
+        ]
+
+        expected = {}
+        mapping = SpillingMapping(threshold=1, spill_dir=str(tmp_path))
+        for update in updates:
+            expected.update(update)
+            mapping.update(update)
+
+        assert mapping.segments == 3
+        assert list(mapping.items()) == sorted(expected.items())
+
+        mapping.close()
+        assert os.listdir(tmp_path) == []
+
+    def test_no_spill(self, tmp_path):
+        mapping = SpillingMapping(spill_dir=str(tmp_path))
+        mapping.update({'b': ['b1'] * 100, 'a': ['a1']})
+
+        assert mapping.segments == 0
+        assert os.listdir(tmp_path) == []
+        assert [drs for drs, _ in mapping.items()] == ['a', 'b']
+
+
+class TestProcessDatasetsSpill:
+    def test_spilled_output_matches(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        other = dataset.parent / 'L2'
+        other.mkdir()
+        (other / 'ESACCI-CLOUD-L2-CLD_PRODUCTS-AVHRR_NOAA-20080101-fv3.0.txt').touch()
+
+        # Both datasets from the one mapping file
+        content = json.loads(open(mapping).read())
+        content['datasets'].append(str(other))
+        open(mapping, 'w').write(json.dumps(content))
+
+        spill_dir = tmp_path / 'spill'
+        spill_dir.mkdir()
+
+        outputs = []
+        for threshold in (0, 1):
+            output = tmp_path / f'drs_{threshold}.json'
+            pds = ProcessDatasets(json_files=[mapping], ontology_local=ontology_file,
+                                  output_sinks=[JSONSink(str(output))],
+                                  spill_threshold=threshold, spill_dir=str(spill_dir))
+            pds.process_datasets([str(dataset), str(other)])
+            outputs.append(output.read_text())
+
+        assert outputs[0] == outputs[1]
+        assert len(json.loads(outputs[0])) == 2
+        assert os.listdir(spill_dir) == []
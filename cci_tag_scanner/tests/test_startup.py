@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+import time
+
+from cci_tag_scanner.utils.http_cache import HTTPCache
+
+HEAVY_MODULES = ['numpy', 'netCDF4', 'requests', 'tqdm', 'multiprocessing', 'pydoc']
+
+
+def imported_after(statement, cwd):
+    """Run the statement in a fresh interpreter and return what it loaded"""
+    code = (
+        'import json, logging, sys\n'
+        f'{statement}\n'
+        'root = logging.getLogger()\n'
+        'print(json.dumps({"modules": sorted(sys.modules), "root_handlers": len(root.handlers), '
+        '"root_level": root.level}))\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestStartup:
+    def test_package_import_has_no_side_effects(self, tmp_path):
+        result = imported_after('import cci_tag_scanner', tmp_path)
+
+        assert result['root_handlers'] == 0
+        assert result['root_level'] == 30
+
+    def test_command_line_client(self, tmp_path):
+        result = imported_after('from cci_tag_scanner.scripts import CCITaggerCommandLineClient', tmp_path)
+
+        assert not set(HEAVY_MODULES + ['cci_tag_scanner.tagger']) & set(result['modules'])
+        assert list(tmp_path.iterdir()) == []
+
+    def test_json_check(self, tmp_path):
+        result = imported_after('from cci_tag_scanner.scripts import TestJSONFile', tmp_path)
+
+        assert 'cci_tag_scanner.scripts.command_line_client' not in result['modules']
+        assert not set(HEAVY_MODULES) & set(result['modules'])
+
+    def test_tagger(self, tmp_path):
+        result = imported_after('from cci_tag_scanner.tagger import ProcessDatasets', tmp_path)
+
+        assert not set(HEAVY_MODULES) & set(result['modules'])
+
+    def test_help(self, tmp_path):
+        code = 'from cci_tag_scanner.scripts import CCITaggerCommandLineClient as c; c.main()'
+        result = subprocess.run([sys.executable, '-c', code, '--help'], cwd=tmp_path,
+                                capture_output=True, text=True)
+
+        assert result.returncode == 0
+        assert '--json_file' in result.stdout
+        assert list(tmp_path.iterdir()) == []
+
+    def test_verbose_logging(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        code = 'from cci_tag_scanner.scripts import CCITaggerCommandLineClient as c; c.main()'
+        result = subprocess.run([sys.executable, '-c', code, '-j', mapping, '--ontology', ontology_file,
+                                 '-o', 'null', '-v'], cwd=tmp_path, capture_output=True, text=True)
+
+        assert result.returncode == 0
+        assert 'INFO [cci_tag_scanner.tagger]: Processing a maximum of unlimited files' in result.stderr
+        assert 'INFO [cci_tag_scanner.tagger]: 1 Datasets: 0 failed' in result.stderr
+        assert 'FINISHED' in result.stderr
+
+    def test_warm_ontology_cache(self, ontology, tmp_path):
+        url = 'https://vocab.invalid/cci-ontology.json'
+        cache = HTTPCache(url, cache_dir=str(tmp_path))
+        with open(cache.path, 'w') as writer:
+            json.dump(ontology, writer)
+        with open(f'{cache.path}.meta', 'w') as writer:
+            json.dump({'url': url, 'validated': time.time()}, writer)
+
+        result = imported_after(
+            'from cci_tag_scanner.facets import Facets\n'
+            f'Facets(endpoint={url!r}, cache_dir={str(tmp_path)!r})',
+            tmp_path
+        )
+
+        assert 'requests' not in result['modules']
@@ -0,0 +1,44 @@
+from cci_tag_scanner.tagger import ProcessDatasets
+
+
+def get_tagger(ontology_file, mapping, **kwargs):
+    return ProcessDatasets(
+        suppress_file_output=True, json_files=[mapping],
+        ontology_local=ontology_file, **kwargs
+    )
+
+
+class TestProcessDatasets:
+    def test_get_file_tags(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+        pds = get_tagger(ontology_file, mapping)
+
+        fpath = str(next(dataset.glob('2008/*')))
+        tagged = pds.get_file_tags(fpath)
+
+        assert tagged.drs == 'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1'
+        assert tagged.labels['platform_group'] == ['Satellite']
+
+    def test_get_files_tags(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+        pds = get_tagger(ontology_file, mapping)
+
+        fpaths = sorted(str(f) for f in dataset.glob('*/*')) + ['/not/a/dataset/file.nc']
+        batched = list(pds.get_files_tags(fpaths, batch_size=3))
+
+        assert batched == [pds.get_file_tags(f) for f in fpaths]
+
+    def test_dataset_cache(self, ontology_file, cci_dataset):
+        dataset, mapping = cci_dataset
+        pds = get_tagger(ontology_file, mapping, dataset_cache_size=1)
+
+        fpath = str(next(dataset.glob('2008/*')))
+        first = pds.get_dataset(fpath)
+        first.not_found_messages.add('platform: unknown')
+
+        assert pds.get_dataset(fpath) is first
+        assert not first.not_found_messages
+
+        pds.get_dataset('/not/a/dataset')
+        assert pds.get_dataset(fpath) is not first
+        assert pds.dataset_cache_info() == (1, 3, 1, 1)
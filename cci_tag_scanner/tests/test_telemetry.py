@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.utils.cache import CacheInfo
+from cci_tag_scanner.utils.telemetry import RunTelemetry
+
+
+class TestRunTelemetry:
+    def test_counters(self, tmp_path):
+        fpath = tmp_path / 'file.nc'
+        fpath.write_bytes(b'1' * 100)
+
+        telemetry = RunTelemetry(metrics_file=str(tmp_path / 'tagger.prom'),
+                                 cache_info=lambda: {'dataset': CacheInfo(3, 1, 10, 4), 'result': None})
+        telemetry.start(2)
+        telemetry.file_done(fpath)
+        telemetry.file_done(tmp_path / 'gone.nc')
+        telemetry.dataset_done('/dataset/1', failed_files=1)
+
+        metrics = telemetry.metrics()
+        assert metrics['files_scanned'] == 2
+        assert metrics['bytes_tagged'] == 100
+        assert metrics['datasets_done'] == 1
+        assert metrics['files_failed'] == 1
+        assert 'eta_seconds' in metrics
+        assert metrics['caches'] == {'dataset': {'hits': 3, 'misses': 1, 'hit_rate': 0.75}}
+
+    def test_bytes_only_counted_when_shown(self, tmp_path, monkeypatch):
+        from cci_tag_scanner.utils import telemetry as telemetry_module
+        monkeypatch.setattr(telemetry_module, '_file_size', lambda filepath: pytest.fail('stat of a tagged file'))
+
+        telemetry = RunTelemetry(summary_file=str(tmp_path / 'summary.json'))
+        telemetry.start(1)
+        telemetry.file_done(tmp_path / 'file.nc')
+
+        assert telemetry.summary()['files_scanned'] == 1
+        assert 'bytes_tagged' not in telemetry.summary()
+
+    def test_prometheus(self, tmp_path):
+        metrics_file = tmp_path / 'tagger.prom'
+        telemetry = RunTelemetry(metrics_file=str(metrics_file),
+                                 cache_info=lambda: {'dataset': CacheInfo(3, 1, 10, 4)})
+        telemetry.start(1)
+
+        content = metrics_file.read_text()
+        assert 'cci_tagger_datasets_total 1\n' in content
+        assert '# TYPE cci_tagger_files_scanned counter\n' in content
+        assert 'cci_tagger_cache_hits{cache="dataset"} 3\n' in content
+
+    def test_bad_format(self):
+        with pytest.raises(ValueError):
+            RunTelemetry(metrics_format='xml')
+
+
+class TestProcessDatasetsTelemetry:
+    def test_summary(self, ontology_file, cci_dataset, tmp_path):
+        dataset, mapping = cci_dataset
+        metrics_file = tmp_path / 'metrics.json'
+        summary_file = tmp_path / 'summary.json'
+
+        telemetry = RunTelemetry(metrics_file=str(metrics_file), metrics_format='json',
+                                 interval=0, summary_file=str(summary_file))
+        pds = ProcessDatasets(suppress_file_output=True, json_files=[mapping],
+                              ontology_local=ontology_file, telemetry=telemetry)
+        pds.process_datasets([str(dataset)])
+
+        summary = json.loads(summary_file.read_text())
+        assert summary['datasets_done'] == 1
+        assert summary['files_scanned'] == 4
+        assert summary['caches']['dataset'] == {'hits': 0, 'misses': 1, 'hit_rate': 0.0}
+        assert 'result' not in summary['caches']
+
+        assert json.loads(metrics_file.read_text())['files_scanned'] == 4
@@ -0,0 +1,58 @@
+import json
+
+from cci_tag_scanner import watch as watch_module
+from cci_tag_scanner.output.json_sink import JSONLinesSink
+from cci_tag_scanner.tagger import ProcessDatasets
+from cci_tag_scanner.watch import PollingWatcher, watch
+
+NEW_FILE = '200803-ESACCI-L3C_CLOUD-CLD_PRODUCTS-AVHRR_NOAA-fv3.0.txt'
+
+
+class TestWatch:
+    def test_polling_watcher(self, tmp_path):
+        existing = tmp_path / 'existing.nc'
+        existing.write_bytes(b'1')
+
+        watcher = PollingWatcher([tmp_path], interval=0, settle=0)
+        assert watcher.poll() == []
+
+        new = tmp_path / 'sub' / 'new.nc'
+        new.parent.mkdir()
+        new.write_bytes(b'1')
+        store = tmp_path / 'new.zarr'
+        store.mkdir()
+        (store / '.zmetadata').write_text('{}')
+        (store / '0.0').write_bytes(b'1')
+
+        assert sorted(watcher.poll()) == [store, new]
+        assert watcher.poll() == []
+
+        existing.write_bytes(b'12')
+        assert watcher.poll() == [existing]
+
+    def test_settle(self, tmp_path):
+        watcher = PollingWatcher([tmp_path], interval=0, settle=3600)
+        (tmp_path / 'writing.nc').write_bytes(b'1')
+        assert watcher.poll() == []
+        assert watcher.poll() == []
+
+    def test_watch_tags_new_files(self, ontology_file, cci_dataset, tmp_path, monkeypatch):
+        dataset, mapping = cci_dataset
+        output = tmp_path / 'drs.jsonl'
+
+        pds = ProcessDatasets(json_files=[mapping], ontology_local=ontology_file,
+                              output_sinks=[JSONLinesSink(str(output))])
+
+        new = dataset / '2008' / NEW_FILE
+
+        def arrive(seconds):
+            new.touch()
+
+        monkeypatch.setattr(watch_module.time, 'sleep', arrive)
+        watch(pds, [dataset], interval=0, use_inotify=False, settle=0, max_polls=1)
+
+        # Written and flushed before the outputs are closed
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert {'drs': 'esacci.CLOUD.mon.L3C.CLD_PRODUCTS.AVHRR.NOAA-16.AVHRR_NOAA.3-0.r1', 'files': [str(new)]} in records
+        assert any(record.get('dataset') == str(dataset) for record in records)
+        pds.close()
@@ -0,0 +1,98 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import json
+import sqlite3
+
+
+def _to_json(value):
+    # netCDF attributes can be numpy scalars or arrays
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class AttributeStore(object):
+    """
+    SQLite store of the raw tags for each file: the tags parsed from the
+    filename and the global attributes read from the file. These are all
+    the inputs taken from the filesystem, so a dataset can be retagged
+    from the store after the ontology or a JSON mapping changes.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: SQLite database file. Created if it does not exist
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path TEXT PRIMARY KEY, dataset TEXT NOT NULL, '
+            'filename_tags TEXT NOT NULL, metadata_tags TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS files_dataset ON files (dataset)')
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def put(self, dataset, filepath, filename_tags, metadata_tags):
+        """
+        Store the raw tags for a file. Call commit to write them.
+
+        :param dataset: Dataset id
+        :param filepath: Path to the file (str)
+        :param filename_tags: Output from Dataset._parse_file_name (dict)
+        :param metadata_tags: Output from Dataset._scan_file (dict)
+        """
+        self._conn.execute(
+            'INSERT OR REPLACE INTO files (path, dataset, filename_tags, metadata_tags) VALUES (?, ?, ?, ?)',
+            (filepath, dataset, json.dumps(filename_tags), json.dumps(metadata_tags, default=_to_json))
+        )
+
+    def get_files(self, dataset):
+        """
+        :param dataset: Dataset id
+        :return: list of filepath (str), filename tags (dict), metadata tags (dict), in the order stored
+        """
+        rows = self._conn.execute(
+            'SELECT path, filename_tags, metadata_tags FROM files WHERE dataset = ? ORDER BY rowid',
+            (dataset,)
+        )
+        return [(path, json.loads(filename_tags), json.loads(metadata_tags)) for path, filename_tags, metadata_tags in rows]
+
+    def has_dataset(self, dataset):
+        """
+        :param dataset: Dataset id
+        :return: True if any files are stored for the dataset
+        """
+        row = self._conn.execute('SELECT 1 FROM files WHERE dataset = ? LIMIT 1', (dataset,)).fetchone()
+        return row is not None
+
+    def datasets(self):
+        """
+        :return: Dataset ids with stored files (list)
+        """
+        return [row[0] for row in self._conn.execute('SELECT DISTINCT dataset FROM files ORDER BY dataset')]
+
+    def remove_dataset(self, dataset):
+        self._conn.execute('DELETE FROM files WHERE dataset = ?', (dataset,))
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -17,6 +17,7 @@ import glob
 import logging
 
 from cci_tag_scanner import logstream
+from cci_tag_scanner.utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logstream)
@@ -39,25 +40,28 @@ def nested_get(key_list, input_dict):
         else:
             return dict_nest.get(key)
 
+# Marks a directory which has not been resolved yet
+_MISSING = object()
+
+# Sections of the JSON files which apply to every dataset in the file
+FILE_SECTIONS = ('mappings', 'defaults', 'overrides')
+
+# Sections of the JSON files which are keyed by dataset
+DATASET_SECTIONS = ('realisations', 'filters', 'references')
+
+
 class DatasetJSONMappings:
 
-    def __init__(self, json_files=None, json_tagger_root=None):
+    def __init__(self, json_files=None, json_tagger_root=None, resolution_cache_size=4096):
         """
         :param json_files: A collection of json files to read in.
+        :param json_tagger_root: Directory to search for json files if none are given
+        :param resolution_cache_size: Number of directories to remember the dataset for
 
         """
 
-        # A mapping between the datasets and the filepath to the JSON file
-        # containing the mappings
-        self._json_lookup = {}
-        self._partial_jsons = {}
-
-        # Place to cache the loaded mappings from the JSON files once they are required
-        # in the processing
-        self._user_json_cache = {}
-
-        # Init tree
-        self._dataset_tree = DatasetNode()
+        # Directory -> dataset lookups. Cleared whenever the tree is rebuilt
+        self._resolution_cache = LRUCache(resolution_cache_size)
 
         if not json_files:
             logger.warning('No JSON files provided, will look for JSON_TAGGER_ROOT environment var')
@@ -78,7 +82,30 @@ class DatasetJSONMappings:
                 # Must use recursive to final all files
                 json_files = glob.glob(f'{path_root}/**/*.json', recursive=True)
 
-        # Read all the json files and build a tree of datasets
+        self._build_tree(json_files)
+
+        logger.info(f'Loading JSONs from {json_tagger_root}')
+
+    def _build_tree(self, json_files):
+        """
+        Read all the json files and build a tree of datasets. Replaces
+        any existing tree.
+        :param json_files: A collection of json files to read in.
+        """
+
+        # A mapping between the datasets and the filepath to the JSON file
+        # containing the mappings
+        self._json_lookup = {}
+        self._partial_jsons = {}
+
+        # Place to cache the loaded mappings from the JSON files once they are required
+        # in the processing
+        self._user_json_cache = {}
+
+        # Init tree
+        self._dataset_tree = DatasetNode()
+        self._resolution_cache.clear()
+
         i = 0
         for f in json_files:
 
@@ -108,15 +135,38 @@ class DatasetJSONMappings:
                 self._json_lookup[dataset] = pfile
                 j += 1
 
-        logger.info(f'Loading JSONs from {json_tagger_root}')
         logger.info(f'Loaded {i} JSON files')
         logger.info(f'Loaded {j} partial JSON files')
 
     def get_dataset(self, path):
         """
-        Returns the dataset which directly matches the given file path
+        Returns the dataset which directly matches the given file path.
+        All the files in a directory resolve to the same dataset so the
+        result is cached against the parent directory.
         :param path: Filepath to match (String)
-        :return: Dataset (string) | default: None
+        :return: Dataset (string) | default: path
+        """
+
+        parent, _, _ = path.rpartition('/')
+
+        # A path which is itself a dataset does not share the result
+        # of its parent directory
+        if not parent or path.rstrip('/') in self._json_lookup:
+            return self._search_dataset(path) or path
+
+        ds = self._resolution_cache.get(parent, _MISSING)
+
+        if ds is _MISSING:
+            ds = self._search_dataset(parent)
+            self._resolution_cache.put(parent, ds)
+
+        return ds or path
+
+    def _search_dataset(self, path):
+        """
+        Search the tree for the dataset containing the path
+        :param path: Filepath to match (String)
+        :return: Dataset (string) | None
         """
 
         ds = self._dataset_tree.search_name(path)
@@ -124,7 +174,11 @@ class DatasetJSONMappings:
         if ds:
             return ds[:-1]
 
-        return path
+    def resolution_cache_info(self):
+        """
+        :return: hits, misses, maxsize and currsize of the directory cache (CacheInfo)
+        """
+        return self._resolution_cache.info()
 
     def get_user_defined_mapping(self, dataset):
         """
@@ -269,6 +323,56 @@ class DatasetJSONMappings:
 
         return realisation
 
+    def get_dataset_reference(self, dataset):
+        """
+        Get the reference document which holds the file attributes for the
+        dataset from the "references" section. Relative paths are resolved
+        against the directory of the JSON file.
+        :param dataset: (string)
+        :return: path to the reference (string) | None
+        """
+
+        # Load the relevant json file
+        data = self.load_mapping(dataset)
+
+        reference = nested_get(('references', dataset), data)
+
+        # Check for dataset with trailing slash
+        if not reference:
+            reference = nested_get(('references', f'{dataset}/'), data)
+
+        if not reference:
+            return None
+
+        mapping_dir = os.path.dirname(self._json_lookup[dataset])
+        return os.path.join(mapping_dir, reference)
+
+    def datasets(self):
+        """
+        :return: All the datasets with a JSON file (list)
+        """
+        return list(self._json_lookup)
+
+    def get_dataset_settings(self, dataset):
+        """
+        Everything in the JSON files which affects how the dataset is tagged.
+        Sections which apply to the whole file are returned as they are.
+        Sections keyed by dataset only include the entry for this dataset.
+        :param dataset: (string)
+        :return: settings (dict)
+        """
+        data = self.load_mapping(dataset)
+
+        settings = {section: data.get(section) for section in FILE_SECTIONS}
+
+        for section in DATASET_SECTIONS:
+            value = nested_get((section, dataset), data)
+            if value is None:
+                value = nested_get((section, f'{dataset}/'), data)
+            settings[section] = value
+
+        return settings
+
     def get_aggregations(self, filepath):
 
         # Get dataset
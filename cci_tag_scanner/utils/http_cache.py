@@ -0,0 +1,157 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No file locking on this platform
+    fcntl = None
+
+import logging
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.conf.settings import HTTP_CACHE_DIR, HTTP_CACHE_MAX_STALE, HTTP_CACHE_REVALIDATE_AFTER
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+class HTTPCache(object):
+    """
+    On disk cache for a single URL. The document is revalidated with
+    ETag/Last-Modified conditional requests and a lock file makes sure
+    concurrent processes on the same node only download it once.
+
+    If the server cannot be reached the cached copy is used, as long as it
+    was last validated within max_stale seconds.
+    """
+
+    def __init__(self, url, cache_dir=None, max_stale=None, revalidate_after=None, timeout=60):
+        """
+        :param url: URL of the document
+        :param cache_dir: Directory to keep the cache in. Default: settings.HTTP_CACHE_DIR
+        :param max_stale: Seconds a cached copy can be used for when the server is unreachable
+        :param revalidate_after: Seconds a cached copy is used for before asking the server again
+        :param timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.cache_dir = cache_dir or HTTP_CACHE_DIR
+        self.max_stale = HTTP_CACHE_MAX_STALE if max_stale is None else max_stale
+        self.revalidate_after = HTTP_CACHE_REVALIDATE_AFTER if revalidate_after is None else revalidate_after
+        self.timeout = timeout
+
+        key = hashlib.sha256(url.encode()).hexdigest()[:32]
+        self.path = os.path.join(self.cache_dir, key)
+        self._meta_path = f'{self.path}.meta'
+        self._lock_path = f'{self.path}.lock'
+
+    def fetch(self):
+        """
+        Return the path to an up to date copy of the document
+
+        :return: path (str)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with self._lock():
+            meta = self._read_meta()
+            cached = meta is not None and os.path.isfile(self.path)
+            age = time.time() - meta['validated'] if cached else None
+
+            if cached and age < self.revalidate_after:
+                return self.path
+
+            # Imported here so a fresh cached copy is used without loading requests
+            import requests
+
+            try:
+                self._download(meta if cached else None)
+
+            except (requests.RequestException, OSError) as e:
+                if cached and age < self.max_stale:
+                    logger.warning(f'Could not reach {self.url}: {e}. Using cached copy from {age:.0f}s ago')
+                    return self.path
+
+                raise ValueError(f'Unable to retrieve content from {self.url} and no usable cached copy: {e}')
+
+        return self.path
+
+    def _download(self, meta):
+        """
+        Make a conditional request and update the cache
+        :param meta: Metadata of the cached copy | None
+        """
+        import requests
+
+        headers = {'Accept-Encoding': 'gzip, deflate'}
+
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        with requests.get(self.url, headers=headers, stream=True,
+                          verify=False, timeout=self.timeout) as response:
+
+            if response.status_code == 304:
+                logger.info(f'Cached copy of {self.url} is up to date')
+                meta['validated'] = time.time()
+                self._write_meta(meta)
+                return
+
+            response.raise_for_status()
+
+            # Write to a temporary file so readers never see a partial document
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as writer:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    writer.write(chunk)
+
+            os.replace(tmp_path, self.path)
+            logger.info(f'Downloaded {self.url}')
+
+            self._write_meta({
+                'url': self.url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'validated': time.time()
+            })
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path) as reader:
+                return json.load(reader)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp_path = f'{self._meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as writer:
+            json.dump(meta, writer)
+        os.replace(tmp_path, self._meta_path)
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+
+        with open(self._lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,81 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from functools import partial
+import json
+import re
+
+# Whitespace and separators between the items of an array
+_SEPARATOR = re.compile(r'[\s,]*')
+_DELIMITERS = ' \t\n\r,]'
+_DECODER = json.JSONDecoder()
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_chunks(reader, chunk_size=CHUNK_SIZE):
+    """
+    Read a text file in chunks
+    :param reader: Open text file
+    :param chunk_size: Characters per chunk
+    :return: generator of str
+    """
+    return iter(partial(reader.read, chunk_size), '')
+
+
+def iter_json_array(chunks):
+    """
+    Decode the items of a top level JSON array one at a time, so only
+    one item and one chunk of the document are held in memory.
+
+    :param chunks: Iterable of text chunks making up the document
+    :return: generator of decoded items
+    """
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+    started = False
+    exhausted = False
+
+    while True:
+        pos = _SEPARATOR.match(buffer, pos).end()
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError('Expected a JSON array')
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == ']':
+                return
+
+            try:
+                item, end = _DECODER.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            else:
+                # A number may continue in the next chunk
+                complete = end < len(buffer) and buffer[end] in _DELIMITERS
+                if complete or exhausted or isinstance(item, (dict, list, str)):
+                    yield item
+                    pos = end
+                    continue
+
+        if exhausted:
+            raise ValueError('Unexpected end of JSON array')
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            continue
+
+        buffer = buffer[pos:] + chunk
+        pos = 0
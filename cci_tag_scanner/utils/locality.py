@@ -0,0 +1,84 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from itertools import groupby
+import os
+import pathlib
+
+
+def directory_key(files):
+    """
+    Key which keeps the files of a directory together, in name order
+    :param files: Files which will be sorted (list of pathlib.Path)
+    :return: key function
+    """
+    return lambda path: (path.parent.as_posix(), path.name)
+
+
+def inode_key(files):
+    """
+    Key which keeps the files of a directory together, in inode order. On
+    most filesystems inode order follows creation order and the layout of
+    the metadata on disk.
+
+    The inodes come from one directory listing per directory rather than a
+    stat of every file.
+    :param files: Files which will be sorted (list of pathlib.Path)
+    :return: key function
+    """
+    inodes = {}
+
+    for parent in {path.parent for path in files}:
+        try:
+            with os.scandir(parent) as entries:
+                for entry in entries:
+                    inodes[entry.name, parent] = entry.inode()
+        except OSError:
+            continue
+
+    return lambda path: (path.parent.as_posix(), inodes.get((path.name, path.parent), 0))
+
+
+# Orderings available to order_by_locality. "walk" leaves the files in
+# the order they were found
+LOCALITY_KEYS = {
+    'walk': None,
+    'directory': directory_key,
+    'inode': inode_key,
+}
+
+
+def order_by_locality(files, key='inode'):
+    """
+    Order files so that each directory is scanned in one pass, letting the
+    filesystem's metadata caching and readahead work for us.
+
+    :param files: Files to order (iterable of str | pathlib.Path)
+    :param key: Name in LOCALITY_KEYS, or a function which takes the list of
+        files and returns a sort key function
+    :return: list of pathlib.Path
+    """
+    files = [pathlib.Path(f) for f in files]
+
+    if isinstance(key, str):
+        key = LOCALITY_KEYS[key]
+
+    if key is None:
+        return files
+
+    return sorted(files, key=key(files))
+
+
+def batch_by_directory(files):
+    """
+    Group consecutive files in the same directory
+    :param files: Files, ordered so each directory is contiguous (iterable of pathlib.Path)
+    :return: generator of directory (pathlib.Path), files (list of pathlib.Path)
+    """
+    for parent, batch in groupby(files, key=lambda path: pathlib.Path(path).parent):
+        yield parent, list(batch)
@@ -0,0 +1,146 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import time
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.conf.settings import HEADER_SIZE
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Read latencies (seconds) above which the buffer is grown and below which
+# it is shrunk. Slow reads are dominated by the round trip, so reading more
+# per request costs little
+SLOW_READ = 0.01
+FAST_READ = 0.001
+
+
+def read_header(filepath, size):
+    """
+    Read the start of a file with a single pread, after hinting the kernel
+    to start reading it in.
+
+    :param filepath: Path to the file
+    :param size: Bytes to read
+    :return: header (bytes) | None if it is not a readable file, seconds taken (float)
+    """
+    start = time.perf_counter()
+
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        # Directories (Zarr stores) and unreadable files are left to the handlers
+        return None, time.perf_counter() - start
+
+    try:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+        header = os.pread(fd, size, 0)
+    except OSError:
+        header = None
+    finally:
+        os.close(fd)
+
+    return header, time.perf_counter() - start
+
+
+class HeaderPrefetcher(object):
+    """
+    Reads the headers of upcoming files in a thread pool while earlier files
+    are being parsed. Iterating gives (filepath, header) in the input order.
+
+    The number of reads in flight grows when the consumer has to wait for a
+    header and shrinks when headers are always ready. The buffer size grows
+    when reads are slow and shrinks when they are fast.
+    """
+
+    def __init__(self, files, depth=8, buffer_size=HEADER_SIZE, workers=4,
+                 min_depth=1, max_depth=64, min_buffer=HEADER_SIZE, max_buffer=HEADER_SIZE * 16,
+                 skip=None):
+        """
+        :param files: Files to read (iterable of pathlib.Path)
+        :param depth: Initial number of files to read ahead
+        :param buffer_size: Initial bytes to read from each file
+        :param workers: Reader threads
+        :param min_depth: Smallest read ahead
+        :param max_depth: Largest read ahead
+        :param min_buffer: Smallest buffer size. Handlers take a header shorter than
+                           HEADER_SIZE to be the whole file, so keep it at least that
+        :param max_buffer: Largest buffer size
+        :param skip: Function returning True for files which do not need a header
+        """
+        self.files = files
+        self.depth = depth
+        self.buffer_size = buffer_size
+        self.workers = workers
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.min_buffer = min_buffer
+        self.max_buffer = max_buffer
+        self.skip = skip
+
+        # Reads where the consumer had to wait
+        self.stalls = 0
+        self.reads = 0
+
+    def _adapt(self, waited, latency):
+        if waited:
+            self.stalls += 1
+            self.depth = min(self.depth * 2, self.max_depth)
+        elif self.depth > self.min_depth and self.reads % self.depth == 0:
+            self.depth -= 1
+
+        if latency > SLOW_READ:
+            self.buffer_size = min(self.buffer_size * 2, self.max_buffer)
+        elif latency < FAST_READ:
+            self.buffer_size = max(self.buffer_size // 2, self.min_buffer)
+
+    def __iter__(self):
+        files = iter(self.files)
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            def fill():
+                while len(pending) < self.depth:
+                    try:
+                        filepath = next(files)
+                    except StopIteration:
+                        return
+
+                    if self.skip is not None and self.skip(filepath):
+                        pending.append((filepath, None))
+                    else:
+                        pending.append((filepath, pool.submit(read_header, filepath, self.buffer_size)))
+
+            fill()
+
+            while pending:
+                filepath, future = pending.popleft()
+
+                if future is None:
+                    fill()
+                    yield filepath, None
+                    continue
+
+                waited = not future.done()
+                header, latency = future.result()
+                self.reads += 1
+                self._adapt(waited, latency)
+
+                fill()
+                yield filepath, header
+
+        logger.debug(f'Prefetched {self.reads} headers. Consumer waited on {self.stalls}. '
+                     f'Final depth {self.depth}, buffer {self.buffer_size}')
@@ -0,0 +1,194 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import bisect
+import cProfile
+import heapq
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1, 10, 60, float('inf'))
+
+
+def _bucket_label(bound):
+    return f'<={bound}s' if bound != float('inf') else f'>{LATENCY_BUCKETS[-2]}s'
+
+
+class RunProfiler(object):
+    """
+    Profiles a tagging run. The time taken to tag each file is recorded,
+    split into CPU time in this process and the rest of the wall time, which
+    is mostly waiting on I/O. Time spent in a scan worker subprocess
+    (--scan-timeout) counts as I/O.
+
+    With functions, the run is also executed under cProfile. Its overhead
+    grows with the number of Python calls, so it inflates the CPU time of
+    files which are expensive to parse.
+    """
+
+    def __init__(self, top=20, functions=False):
+        """
+        :param top: Number of slowest files and datasets to report
+        :param functions: Profile the function calls with cProfile
+        """
+        self.top = top
+        self.functions = functions
+        self.histogram = {kind: [0] * len(LATENCY_BUCKETS) for kind in ('wall', 'io', 'cpu')}
+        self.datasets = {}
+        self.stats = None
+
+        # Min heap of the slowest files so far
+        self._slowest = []
+
+    @contextmanager
+    def time_file(self, dataset_id, filepath):
+        """
+        Record the time taken by the body for a file. Recorded even if it
+        raises, as files which hang or crash the scanner are often the slowest.
+        :param dataset_id: Dataset the file belongs to
+        :param filepath: Path to the file
+        """
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = min(time.process_time() - cpu_start, wall)
+            self.record(dataset_id, filepath, wall, cpu)
+
+    def record(self, dataset_id, filepath, wall, cpu):
+        """
+        :param dataset_id: Dataset the file belongs to
+        :param filepath: Path to the file
+        :param wall: Seconds taken to tag the file
+        :param cpu: CPU seconds used in this process
+        """
+        io_time = wall - cpu
+
+        for kind, seconds in (('wall', wall), ('io', io_time), ('cpu', cpu)):
+            self.histogram[kind][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+        totals = self.datasets.setdefault(dataset_id, [0, 0.0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += io_time
+        totals[3] += cpu
+
+        entry = (wall, str(filepath), dataset_id, io_time, cpu)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif wall > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call func, under cProfile if functions are profiled
+        :return: The result of func
+        """
+        if not self.functions:
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.stats = pstats.Stats(profile)
+
+    def slowest_files(self):
+        """
+        :return: list of dict, slowest first
+        """
+        return [
+            {'file': filepath, 'dataset': dataset_id, 'wall': wall, 'io': io_time, 'cpu': cpu}
+            for wall, filepath, dataset_id, io_time, cpu in sorted(self._slowest, reverse=True)
+        ]
+
+    def slowest_datasets(self):
+        """
+        :return: list of dict, largest total time first
+        """
+        slowest = heapq.nlargest(self.top, self.datasets.items(), key=lambda item: item[1][1])
+        return [
+            {'dataset': dataset_id, 'files': files, 'wall': wall, 'io': io_time, 'cpu': cpu,
+             'mean_wall': wall / files}
+            for dataset_id, (files, wall, io_time, cpu) in slowest
+        ]
+
+    def report(self):
+        """
+        :return: Latency histograms and the slowest files and datasets (dict)
+        """
+        labels = [_bucket_label(bound) for bound in LATENCY_BUCKETS]
+        return {
+            'files': sum(self.histogram['wall']),
+            'histogram': {kind: dict(zip(labels, counts)) for kind, counts in self.histogram.items()},
+            'slowest_files': self.slowest_files(),
+            'slowest_datasets': self.slowest_datasets(),
+        }
+
+    def format_report(self):
+        """
+        :return: Human readable report (str)
+        """
+        report = self.report()
+        lines = [f'\nPROFILE OF {report["files"]} FILES\n', 'Latency per file      wall       io      cpu']
+
+        for label in report['histogram']['wall']:
+            counts = [report['histogram'][kind][label] for kind in ('wall', 'io', 'cpu')]
+            lines.append(f'{label:>16} {counts[0]:8d} {counts[1]:8d} {counts[2]:8d}')
+
+        lines.append(f'\nSLOWEST {len(report["slowest_files"])} FILES (wall / io / cpu seconds):')
+        for entry in report['slowest_files']:
+            lines.append(f'{entry["wall"]:8.3f} {entry["io"]:8.3f} {entry["cpu"]:8.3f}  {entry["file"]}')
+
+        lines.append(f'\nSLOWEST {len(report["slowest_datasets"])} DATASETS (files, total wall / io / cpu seconds):')
+        for entry in report['slowest_datasets']:
+            lines.append(f'{entry["files"]:8d} {entry["wall"]:8.3f} {entry["io"]:8.3f} {entry["cpu"]:8.3f}  {entry["dataset"]}')
+
+        return '\n'.join(lines)
+
+    def write(self, directory, n_functions=50):
+        """
+        Write the latency report and, if functions were profiled, the
+        profile. Creates
+            profile.pstats  cProfile output, for snakeviz or pstats
+            profile.txt     top n_functions by cumulative time
+            latency.json    output of report
+        :param directory: Directory to write to
+        :param n_functions: Number of functions to list in profile.txt
+        :return: list of paths written
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = []
+
+        if self.stats is not None:
+            pstats_path = os.path.join(directory, 'profile.pstats')
+            self.stats.dump_stats(pstats_path)
+            written.append(pstats_path)
+
+            stream = io.StringIO()
+            pstats.Stats(pstats_path, stream=stream).sort_stats('cumulative').print_stats(n_functions)
+
+            text_path = os.path.join(directory, 'profile.txt')
+            with open(text_path, 'w') as writer:
+                writer.write(stream.getvalue())
+            written.append(text_path)
+
+        latency_path = os.path.join(directory, 'latency.json')
+        with open(latency_path, 'w') as writer:
+            json.dump(self.report(), writer, indent=2)
+        written.append(latency_path)
+
+        return written
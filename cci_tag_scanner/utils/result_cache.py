@@ -0,0 +1,227 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+from collections import namedtuple
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.conf.settings import RESULT_CACHE_DIR
+from cci_tag_scanner.utils.cache import CacheInfo
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Bump when the stored format or the tagging logic changes so old results are not reused
+CACHE_VERSION = 1
+
+CacheEntry = namedtuple('CacheEntry', ['dataset', 'path', 'size', 'created', 'last_used'])
+
+
+def _hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """
+    On disk cache of Dataset.process_dataset results. Each dataset has one
+    entry, stored with a fingerprint of everything the result depends on:
+
+    - the file manifest: path, size and modification time of every file
+    - the dataset's JSON mapping and reference document
+    - the ontology
+
+    The entry is only used if the fingerprint still matches.
+    """
+
+    def __init__(self, cache_dir=None, ontology_fingerprint=''):
+        """
+        :param cache_dir: Directory to keep the cache in. Default: settings.RESULT_CACHE_DIR
+        :param ontology_fingerprint: From Facets.fingerprint
+        """
+        self.cache_dir = cache_dir or RESULT_CACHE_DIR
+        self.ontology_fingerprint = ontology_fingerprint
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, dataset):
+        return os.path.join(self.cache_dir, f'{_hash(dataset)[:32]}.json.gz')
+
+    @staticmethod
+    def manifest_fingerprint(files):
+        """
+        :param files: Files in the order they are scanned (iterable of pathlib.Path)
+        :return: fingerprint (str)
+        """
+        digest = hashlib.sha256()
+
+        for path in files:
+            try:
+                stat = os.stat(path)
+                digest.update(f'{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+            except OSError:
+                digest.update(f'{path}\0missing\n'.encode())
+
+        return digest.hexdigest()
+
+    def fingerprint(self, dataset, files, mapping, reference=None):
+        """
+        :param dataset: Dataset id
+        :param files: Files in the order they are scanned (list of pathlib.Path)
+        :param mapping: The dataset's JSON mapping (dict)
+        :param reference: Fingerprint of the reference document | None
+        :return: fingerprint (str)
+        """
+        return _hash(
+            str(CACHE_VERSION),
+            dataset,
+            self.manifest_fingerprint(files),
+            json.dumps(mapping, sort_keys=True),
+            reference or '',
+            self.ontology_fingerprint
+        )
+
+    def get(self, dataset, fingerprint):
+        """
+        :param dataset: Dataset id
+        :param fingerprint: From ResultCache.fingerprint
+        :return: dataset URIs (dict), file map (dict), terms not found (set) | None
+        """
+        path = self._path(dataset)
+
+        try:
+            with gzip.open(path, 'rt') as reader:
+                entry = json.load(reader)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if entry.get('fingerprint') != fingerprint:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        # Record the use for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        dataset_uris = {facet: set(uris) for facet, uris in entry['dataset_uris'].items()}
+        return dataset_uris, entry['file_map'], set(entry['not_found_messages'])
+
+    def put(self, dataset, fingerprint, dataset_uris, file_map, not_found_messages):
+        """
+        Store the result for a dataset, replacing any previous entry
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        entry = {
+            'dataset': dataset,
+            'fingerprint': fingerprint,
+            'created': time.time(),
+            'dataset_uris': {facet: sorted(uris) for facet, uris in dataset_uris.items()},
+            'file_map': file_map,
+            'not_found_messages': sorted(not_found_messages)
+        }
+
+        path = self._path(dataset)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+
+        with gzip.open(tmp_path, 'wt') as writer:
+            json.dump(entry, writer, separators=(',', ':'))
+
+        os.replace(tmp_path, path)
+
+    def info(self):
+        """
+        :return: hits, misses, maxsize and currsize of the cache (CacheInfo). There is no maxsize
+        """
+        try:
+            currsize = sum(name.endswith('.json.gz') for name in os.listdir(self.cache_dir))
+        except FileNotFoundError:
+            currsize = 0
+
+        return CacheInfo(self.hits, self.misses, None, currsize)
+
+    def entries(self):
+        """
+        :return: list of CacheEntry, least recently used first
+        """
+        entries = []
+
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+
+        for name in names:
+            if not name.endswith('.json.gz'):
+                continue
+
+            path = os.path.join(self.cache_dir, name)
+
+            try:
+                stat = os.stat(path)
+                with gzip.open(path, 'rt') as reader:
+                    entry = json.load(reader)
+            except (OSError, ValueError):
+                continue
+
+            entries.append(CacheEntry(entry.get('dataset'), path, stat.st_size, entry.get('created'), stat.st_mtime))
+
+        return sorted(entries, key=lambda entry: entry.last_used)
+
+    def evict(self, older_than=None, max_bytes=None):
+        """
+        Remove entries not used for older_than seconds, then the least
+        recently used entries until the cache is under max_bytes.
+
+        :param older_than: Seconds since last use
+        :param max_bytes: Size to shrink the cache to
+        :return: removed entries (list of CacheEntry)
+        """
+        entries = self.entries()
+        removed = []
+        now = time.time()
+
+        total = sum(entry.size for entry in entries)
+
+        for entry in entries:
+            too_old = older_than is not None and now - entry.last_used > older_than
+            too_big = max_bytes is not None and total > max_bytes
+
+            if not (too_old or too_big):
+                continue
+
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+
+            total -= entry.size
+            removed.append(entry)
+
+        return removed
+
+    def clear(self):
+        """
+        Remove all entries
+        :return: removed entries (list of CacheEntry)
+        """
+        return self.evict(older_than=-1)
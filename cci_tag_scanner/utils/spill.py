@@ -0,0 +1,120 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import gzip
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+import logging
+
+from cci_tag_scanner import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+def _read_segment(path):
+    with gzip.open(path, 'rt') as reader:
+        for line in reader:
+            yield tuple(json.loads(line))
+
+
+class SpillingMapping(object):
+    """
+    Collects the DRS to file mapping of each dataset with bounded memory.
+
+    Once more than threshold files are held the mapping is written out as a
+    sorted segment in a temporary directory and cleared. items() merges the
+    segments back in DRS order, so the whole mapping is never in memory at
+    once. As with dict.update, a DRS given again replaces the earlier files.
+    """
+
+    def __init__(self, threshold=0, spill_dir=None):
+        """
+        :param threshold: Number of files to hold before spilling. 0 never spills
+        :param spill_dir: Directory to create the temporary segment directory in. Default: system temp
+        """
+        self.threshold = threshold
+        self.spill_dir = spill_dir
+
+        self._mapping = {}
+        self._files = 0
+        self._segments = []
+        self._tmpdir = None
+
+    @property
+    def segments(self):
+        return len(self._segments)
+
+    def update(self, file_map):
+        """
+        Add the DRS to file mapping of a dataset
+        :param file_map: {drs: [files]}
+        """
+        for drs, files in file_map.items():
+            previous = self._mapping.get(drs)
+            if previous is not None:
+                self._files -= len(previous)
+            self._mapping[drs] = files
+            self._files += len(files)
+
+        if self.threshold and self._files > self.threshold:
+            self._spill()
+
+    def _spill(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='cci_tag_spill_', dir=self.spill_dir)
+
+        path = os.path.join(self._tmpdir, f'{len(self._segments):06d}.jsonl.gz')
+
+        # Level 1 keeps the spill cheap. The segment is only read back once
+        with gzip.open(path, 'wt', compresslevel=1) as writer:
+            for item in sorted(self._mapping.items()):
+                writer.write(json.dumps(item) + '\n')
+
+        logger.debug(f'Spilled {self._files} files for {len(self._mapping)} DRS to {path}')
+
+        self._segments.append(path)
+        self._mapping = {}
+        self._files = 0
+
+    def items(self):
+        """
+        The mapping in DRS order
+        :return: generator of (drs, files)
+        """
+        if not self._segments:
+            yield from sorted(self._mapping.items())
+            return
+
+        # heapq.merge is stable, so with the segments in the order they were
+        # written the last of each group is the most recent
+        sources = [_read_segment(path) for path in self._segments]
+        sources.append(sorted(self._mapping.items()))
+
+        for drs, group in groupby(heapq.merge(*sources, key=itemgetter(0)), key=itemgetter(0)):
+            *_, (_, files) = group
+            yield drs, files
+
+    def close(self):
+        """
+        Remove the spilled segments
+        """
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+        self._segments = []
+        self._mapping = {}
+        self._files = 0
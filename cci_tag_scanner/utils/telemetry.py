@@ -0,0 +1,253 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import json
+import os
+import sys
+import time
+
+METRICS_FORMATS = ('prom', 'json')
+METRIC_PREFIX = 'cci_tagger'
+
+# name: (type, help) for the Prometheus textfile output
+METRICS = {
+    'datasets_total': ('gauge', 'Datasets in the run'),
+    'datasets_done': ('counter', 'Datasets finished'),
+    'datasets_skipped': ('counter', 'Datasets with no data identified'),
+    'datasets_cached': ('counter', 'Datasets taken from the result cache'),
+    'files_scanned': ('counter', 'Files tagged'),
+    'files_cached': ('counter', 'Files in datasets taken from the result cache'),
+    'files_failed': ('counter', 'Files tagged without file metadata because the scan failed'),
+    'bytes_tagged': ('counter', 'Total size of the files tagged'),
+    'terms_not_found': ('gauge', 'Distinct terms not found in the vocabulary'),
+    'elapsed_seconds': ('gauge', 'Seconds since the run started'),
+    'files_per_second': ('gauge', 'Files tagged per second'),
+    'eta_seconds': ('gauge', 'Estimated seconds until the run finishes'),
+}
+
+
+def _file_size(filepath):
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
+
+def _write_atomic(path, content):
+    # Readers such as the node exporter never see a partial file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as writer:
+        writer.write(content)
+    os.replace(tmp_path, path)
+
+
+class RunTelemetry(object):
+    """
+    Counters for a process_datasets run. Shows a progress bar, rewrites a
+    metrics file every interval seconds and writes a JSON summary at the end.
+
+    Finding the size of each file costs a stat, so bytes_tagged is only
+    counted when there is a progress bar or metrics file to show it.
+
+    Cache hit rates are collected from cache_info, a callable returning
+    {name: CacheInfo}.
+    """
+
+    def __init__(self, progress=False, metrics_file=None, metrics_format='prom',
+                 interval=30, summary_file=None, cache_info=None):
+        """
+        :param progress: Show a progress bar on stderr
+        :param metrics_file: Path to rewrite the metrics to. Default: not written
+        :param metrics_format: "prom" for the Prometheus textfile format or "json"
+        :param interval: Seconds between rewrites of the metrics file
+        :param summary_file: Path to write the run summary JSON to at the end. Default: not written
+        :param cache_info: Callable returning {name: CacheInfo}
+        """
+        if metrics_format not in METRICS_FORMATS:
+            raise ValueError(f'Unknown metrics format {metrics_format}. Choose from {METRICS_FORMATS}')
+
+        self.progress = progress
+        self.metrics_file = metrics_file
+        self.metrics_format = metrics_format
+        self.interval = interval
+        self.summary_file = summary_file
+        self.cache_info = cache_info
+        self.count_bytes = bool(progress or metrics_file)
+
+        self.counters = {name: 0 for name in METRICS if METRICS[name][0] == 'counter'}
+        self.datasets_total = 0
+        self.terms_not_found = 0
+        self.current_dataset = None
+
+        self._bar = None
+        self._start = None
+        self._last_write = 0
+
+    def start(self, datasets_total):
+        """
+        :param datasets_total: Number of datasets in the run
+        """
+        self.datasets_total = datasets_total
+        self._start = time.monotonic()
+        self._last_write = self._start
+
+        if self.progress:
+            from tqdm import tqdm
+            self._bar = tqdm(total=datasets_total, unit='ds', file=sys.stderr, dynamic_ncols=True)
+
+        self.write_metrics()
+
+    def start_dataset(self, dataset_id):
+        self.current_dataset = dataset_id
+
+    def file_done(self, filepath):
+        """
+        Count a tagged file
+        :param filepath: Path to the file
+        """
+        self.counters['files_scanned'] += 1
+        if self.count_bytes:
+            self.counters['bytes_tagged'] += _file_size(filepath)
+
+        self._update()
+
+    def files_cached(self, n_files):
+        """
+        Count the files of a dataset taken from the result cache
+        """
+        self.counters['datasets_cached'] += 1
+        self.counters['files_cached'] += n_files
+
+    def dataset_done(self, dataset_id, skipped=False, failed_files=0):
+        """
+        :param dataset_id: Dataset
+        :param skipped: No data was identified for the dataset
+        :param failed_files: Number of files tagged without metadata
+        """
+        self.counters['datasets_done'] += 1
+        self.counters['datasets_skipped'] += int(skipped)
+        self.counters['files_failed'] += failed_files
+        self.current_dataset = None
+
+        if self._bar is not None:
+            self._bar.update(1)
+
+        self._update()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._start if self._start is not None else 0
+
+    def rates(self):
+        """
+        :return: files per second and estimated seconds remaining | None before the first dataset finishes
+        """
+        elapsed = self.elapsed
+        files_per_second = self.counters['files_scanned'] / elapsed if elapsed else 0
+
+        done = self.counters['datasets_done']
+        eta = elapsed / done * (self.datasets_total - done) if done else None
+
+        return files_per_second, eta
+
+    def metrics(self):
+        """
+        :return: {name: value} of the counters and cache hit rates
+        """
+        files_per_second, eta = self.rates()
+
+        metrics = dict(self.counters)
+        if not self.count_bytes:
+            del metrics['bytes_tagged']
+        metrics.update({
+            'datasets_total': self.datasets_total,
+            'terms_not_found': self.terms_not_found,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'files_per_second': round(files_per_second, 3),
+        })
+        if eta is not None:
+            metrics['eta_seconds'] = round(eta, 1)
+
+        metrics['caches'] = {}
+        for name, info in (self.cache_info() if self.cache_info else {}).items():
+            if info is None:
+                continue
+            lookups = info.hits + info.misses
+            metrics['caches'][name] = {
+                'hits': info.hits,
+                'misses': info.misses,
+                'hit_rate': round(info.hits / lookups, 4) if lookups else None,
+            }
+
+        return metrics
+
+    def _update(self):
+        if self._bar is not None:
+            files_per_second, _ = self.rates()
+            self._bar.set_postfix(
+                files=self.counters['files_scanned'],
+                rate=f'{files_per_second:.1f}/s',
+                tagged=f'{self.counters["bytes_tagged"] / 1024 ** 3:.2f}GB',
+                refresh=False
+            )
+
+        if self.metrics_file and time.monotonic() - self._last_write >= self.interval:
+            self.write_metrics()
+
+    def write_metrics(self):
+        """
+        Rewrite the metrics file
+        """
+        if not self.metrics_file:
+            return
+
+        self._last_write = time.monotonic()
+        metrics = self.metrics()
+
+        if self.metrics_format == 'json':
+            metrics['current_dataset'] = self.current_dataset
+            metrics['updated'] = time.time()
+            _write_atomic(self.metrics_file, json.dumps(metrics, indent=2))
+            return
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            if name not in metrics:
+                continue
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} {metric_type}')
+            lines.append(f'{METRIC_PREFIX}_{name} {metrics[name]}')
+
+        for suffix, help_text in (('hits', 'Cache hits'), ('misses', 'Cache misses')):
+            lines.append(f'# HELP {METRIC_PREFIX}_cache_{suffix} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_cache_{suffix} counter')
+            for cache, values in metrics['caches'].items():
+                lines.append(f'{METRIC_PREFIX}_cache_{suffix}{{cache="{cache}"}} {values[suffix]}')
+
+        _write_atomic(self.metrics_file, '\n'.join(lines) + '\n')
+
+    def summary(self):
+        """
+        :return: Run summary (dict)
+        """
+        summary = self.metrics()
+        summary.pop('eta_seconds', None)
+        return summary
+
+    def close(self):
+        """
+        Write the final metrics and the summary
+        """
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+        self.write_metrics()
+
+        if self.summary_file:
+            _write_atomic(self.summary_file, json.dumps(self.summary(), indent=2))
@@ -0,0 +1,247 @@
+# encoding: utf-8
+
+__author__ = 'Daniel Westwood'
+__date__ = '19 Oct 2026'
+__copyright__ = 'Copyright 2026 United Kingdom Research and Innovation'
+__license__ = 'BSD - see LICENSE file in top-level package directory'
+__contact__ = 'daniel.westwood@stfc.ac.uk'
+
+import logging
+import os
+import pathlib
+import time
+
+from cci_tag_scanner import logstream
+from cci_tag_scanner.dataset import Dataset
+from cci_tag_scanner.file_handlers.zarr import ZARR_MARKERS, is_zarr_store
+
+try:
+    import inotify_simple
+except ImportError:
+    # Fall back to polling
+    inotify_simple = None
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+def _signature(path):
+    """
+    Size and modification time of a file. For a Zarr store, of its metadata files
+    :return: tuple | None if the path has gone
+    """
+    try:
+        if path.is_dir():
+            return tuple(
+                (marker, os.stat(path / marker).st_mtime_ns)
+                for marker in ZARR_MARKERS if (path / marker).is_file()
+            )
+
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+def _tagging_unit(path, root):
+    """
+    The file or Zarr store a changed path belongs to
+    :param path: Changed path (pathlib.Path)
+    :param root: Watched root the path is under (pathlib.Path)
+    :return: pathlib.Path
+    """
+    for parent in path.parents:
+        if parent == root or root not in parent.parents:
+            break
+        if is_zarr_store(parent):
+            return parent
+
+    return path
+
+
+class PollingWatcher(object):
+    """
+    Finds new and modified files by walking the roots every interval.
+    Files are only reported once they have not changed for settle seconds,
+    so files which are still being written are not tagged early.
+    """
+
+    def __init__(self, roots, interval=10, settle=2):
+        """
+        :param roots: Directories to watch (iterable)
+        :param interval: Seconds between walks
+        :param settle: Seconds a file must be unchanged before it is reported
+        """
+        self.roots = [pathlib.Path(root) for root in roots]
+        self.interval = interval
+        self.settle = settle
+
+        # Files already reported, and changed files waiting to settle
+        self._seen = self._walk()
+        self._pending = {}
+
+    def _walk(self):
+        files = {}
+        for root in self.roots:
+            if root.is_file():
+                files[root] = _signature(root)
+                continue
+            for path in Dataset._walk_dataset(root):
+                files[path] = _signature(path)
+        return files
+
+    def poll(self):
+        """
+        Wait for the next interval and return the files which have arrived
+        or changed since the last call
+        :return: list of pathlib.Path
+        """
+        time.sleep(self.interval)
+
+        now = time.monotonic()
+        changed = []
+
+        for path, signature in self._walk().items():
+            if signature is None or self._seen.get(path) == signature:
+                continue
+
+            # Restart the settle time if the file is still changing
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)
+                if self.settle > 0:
+                    continue
+            elif now - pending[1] < self.settle:
+                continue
+
+            del self._pending[path]
+            self._seen[path] = signature
+            changed.append(path)
+
+        return changed
+
+    def close(self):
+        return
+
+
+class InotifyWatcher(object):
+    """
+    Finds new and modified files from inotify events. Needs the optional
+    inotify_simple package. Files are reported once they are closed after
+    writing or moved into place.
+    """
+
+    def __init__(self, roots, interval=10):
+        """
+        :param roots: Directories to watch (iterable)
+        :param interval: Seconds to wait for events
+        """
+        self.roots = [pathlib.Path(root) for root in roots]
+        self.interval = interval
+
+        flags = inotify_simple.flags
+        self._file_flags = flags.CLOSE_WRITE | flags.MOVED_TO
+        self._dir_flags = flags.CREATE | flags.MOVED_TO
+        self._mask = self._file_flags | self._dir_flags
+
+        self._inotify = inotify_simple.INotify()
+        self._watches = {}
+
+        for root in self.roots:
+            self._add_tree(root, root)
+
+    def _add_tree(self, directory, root):
+        for dirpath, _, _ in os.walk(directory):
+            try:
+                wd = self._inotify.add_watch(dirpath, self._mask)
+            except OSError as e:
+                logger.warning(f'Cannot watch {dirpath}: {e}')
+                continue
+            self._watches[wd] = (pathlib.Path(dirpath), root)
+
+    def _new_files(self, directory):
+        # Files written into a directory before its watch was added
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                yield pathlib.Path(dirpath) / filename
+
+    def poll(self):
+        """
+        Wait for events and return the files which have arrived or changed
+        :return: list of pathlib.Path
+        """
+        changed = {}
+
+        for event in self._inotify.read(timeout=int(self.interval * 1000)):
+            directory, root = self._watches.get(event.wd, (None, None))
+            if directory is None or not event.name:
+                continue
+
+            path = directory / event.name
+
+            if event.mask & inotify_simple.flags.ISDIR:
+                self._add_tree(path, root)
+                for new_file in self._new_files(path):
+                    changed[_tagging_unit(new_file, root)] = None
+                continue
+
+            if event.mask & self._file_flags:
+                changed[_tagging_unit(path, root)] = None
+
+        return list(changed)
+
+    def close(self):
+        self._inotify.close()
+
+
+def get_watcher(roots, interval=10, use_inotify=True, settle=2):
+    """
+    :param roots: Directories to watch
+    :param interval: Seconds between polls, or to wait for events
+    :param use_inotify: Use inotify if inotify_simple is installed
+    :param settle: Seconds a file must be unchanged before it is reported, when polling
+    :return: InotifyWatcher | PollingWatcher
+    """
+    if use_inotify and inotify_simple is not None:
+        try:
+            return InotifyWatcher(roots, interval)
+        except OSError as e:
+            logger.warning(f'inotify not available: {e}. Polling instead')
+
+    return PollingWatcher(roots, interval, settle)
+
+
+def watch(tagger, roots, interval=10, use_inotify=True, settle=2, max_polls=None):
+    """
+    Tag new and modified files under the roots as they arrive. The tagger
+    keeps the ontology and JSON mappings in memory between files and the
+    results are flushed to its outputs after each batch.
+
+    :param tagger: ProcessDatasets
+    :param roots: Directories to watch (iterable)
+    :param interval: Seconds between polls, or to wait for events
+    :param use_inotify: Use inotify if inotify_simple is installed
+    :param settle: Seconds a file must be unchanged before it is reported, when polling
+    :param max_polls: Stop after this many polls. Default: run until interrupted
+    """
+    watcher = get_watcher(roots, interval, use_inotify, settle)
+    logger.info(f'Watching {len(watcher.roots)} directories with {watcher.__class__.__name__}')
+
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+
+            changed = watcher.poll()
+            if not changed:
+                continue
+
+            logger.info(f'Tagging {len(changed)} new or modified files')
+            tagger.tag_files(sorted(changed))
+
+    except KeyboardInterrupt:
+        logger.info('Stopped watching')
+
+    finally:
+        watcher.close()